@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+OpenShift Service Mesh Inventory Demo - List Serialization Micro-benchmark
+Cost of building a GET /api/inventory page: ORM objects + to_dict() + jsonify()
+against column rows + the serialization module's encoder
+
+Usage: python3 benchmarks/bench_list_serialization.py [--items 500] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [os.path.join(ROOT, 'src', 'backend'), os.path.join(ROOT, 'src', 'common')]
+os.environ.setdefault('FLASK_ENV', 'testing')
+
+import app as backend  # noqa: E402
+import serialization  # noqa: E402
+from config import TestingConfig  # noqa: E402
+from flask import jsonify  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--items', type=int, default=500, help='items per page')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per variant (best is reported)')
+    args = parser.parse_args()
+
+    app = backend.create_app(TestingConfig)
+    backend.create_tables(app)
+    # Production output (the testing config is in debug mode, which indents)
+    app.json.compact = True
+    Item = backend.Item
+
+    with app.test_request_context('/api/inventory'):
+        backend.db.session.add_all(
+            Item(code=f'B{index:05d}', name=f'Benchmark item {index}', quantity=index)
+            for index in range(args.items)
+        )
+        backend.db.session.commit()
+        ordering = (Item.created_at.desc(), Item.id.desc())
+
+        def orm_page():
+            backend.db.session.expunge_all()
+            items = Item.query.order_by(*ordering).limit(args.items).all()
+            return jsonify({'items': [item.to_dict() for item in items]}).get_data()
+
+        def row_page(fields=serialization.ITEM_FIELDS):
+            names, columns = serialization.item_columns(Item, fields)
+            rows = Item.query.with_entities(*columns).order_by(*ordering).limit(args.items).all()
+            return serialization.json_response(
+                {'items': serialization.project_rows(rows, names, fields)}
+            ).get_data()
+
+        if orm_page() != row_page():
+            print("WARNING: row serialization output differs from to_dict() + jsonify()")
+
+        variants = {
+            'ORM + to_dict + jsonify': orm_page,
+            f'rows + {serialization.encoder_name()}': row_page,
+            'rows, ?fields=id,code,quantity': lambda: row_page(('id', 'code', 'quantity')),
+        }
+
+        print(f"{args.items} items per page, best of {args.repeat} runs")
+        baseline = None
+        for name, run in variants.items():
+            best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+            baseline = baseline or best
+            print(f"  {name:<32} {best * 1000:8.2f} ms  {baseline / best:5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+OpenShift Service Mesh Inventory Demo - Validator Serving Benchmark
+Concurrent /validate throughput of the validator under gunicorn (threads) and SERVER=asyncio
+
+Each mode is started as a subprocess on a free port and driven by N
+concurrent keep-alive connections, each sending requests back to back.
+Every valid code pays the simulated 100 ms legacy lookup, so throughput is
+bounded by how many lookups a mode keeps in flight.
+
+Usage: python3 benchmarks/bench_validator_serving.py [--concurrency 16 256 2048] [--requests 4000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+MODES = {
+    # The systemd unit's settings
+    'gunicorn (2 workers x 8 threads)': {'SERVER': 'gunicorn', 'WEB_CONCURRENCY': '2', 'GUNICORN_THREADS': '8'},
+    'asyncio (1 process)': {'SERVER': 'asyncio'},
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_validator(settings, port, log):
+    env = dict(os.environ)
+    env.update(settings)
+    env.update({
+        'PORT': str(port),
+        'PYTHONPATH': os.path.join(ROOT, 'src', 'common'),
+        'VALIDATOR_LOG_FILE': '',
+        # Keep log output from dominating the measurement
+        'LOG_LEVEL': 'WARNING',
+    })
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'src', 'legacy-vm', 'validator.py')],
+        env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health', timeout=1).read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Validator ({settings['SERVER']}) did not start")
+
+
+async def client(port, count, latencies, errors):
+    body = json.dumps({'code': 'ABC123'}).encode()
+    request = (
+        b'POST /validate HTTP/1.1\r\nHost: validator\r\nContent-Type: application/json\r\n'
+        b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body
+    )
+    reader = writer = None
+    for _ in range(count):
+        started = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = int(head.lower().split(b'content-length:')[1].split(b'\r\n')[0])
+            await reader.readexactly(length)
+            if not head.startswith(b'HTTP/1.1 200') and not head.startswith(b'HTTP/1.0 200'):
+                errors.append(head.split(b'\r\n')[0])
+            if b'connection: close' in head.lower():
+                writer.close()
+                writer = None
+        except (OSError, asyncio.IncompleteReadError, IndexError, ValueError) as e:
+            errors.append(repr(e))
+            if writer is not None:
+                writer.close()
+            writer = None
+            continue
+        latencies.append(time.perf_counter() - started)
+    if writer is not None:
+        writer.close()
+
+
+async def drive(port, concurrency, total):
+    latencies, errors = [], []
+    per_client = max(1, total // concurrency)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(port, per_client, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def pct(fraction):
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000 if latencies else float('nan')
+
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': pct(0.50),
+        'p99_ms': pct(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[16, 256, 2048])
+    parser.add_argument('--requests', type=int, default=4000, help='requests per concurrency level')
+    args = parser.parse_args()
+
+    print(f"{'mode':<34}{'clients':>8}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    with open(os.devnull, 'wb') as log:
+        for name, settings in MODES.items():
+            port = free_port()
+            process = start_validator(settings, port, log)
+            try:
+                for concurrency in args.concurrency:
+                    result = asyncio.run(drive(port, concurrency, max(args.requests, concurrency)))
+                    print(f"{name:<34}{concurrency:>8}{result['requests']:>10}{result['errors']:>8}"
+                          f"{result['rps']:>10.0f}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+"""
+OpenShift Service Mesh Inventory Demo - Load Test
+Throughput and latency benchmark for the backend API and the legacy validator
+
+Starts the legacy validator and the backend locally (SQLite by default, or
+any DATABASE_URL such as a local PostgreSQL), seeds items, then drives a
+weighted mix of requests from concurrent keep-alive clients for a fixed
+duration. Per-operation p50/p95/p99 latency and requests per second are
+printed and written as JSON; with --baseline the run is compared against a
+stored result and the exit status is 1 when a hot route regressed.
+
+Standard library only. Examples:
+    python3 benchmarks/loadtest.py --duration 30 --concurrency 16
+    python3 benchmarks/loadtest.py --scenario reads --save-baseline benchmarks/baseline.json
+    python3 benchmarks/loadtest.py --baseline benchmarks/baseline.json --tolerance 0.15
+    python3 benchmarks/loadtest.py --backend-url http://localhost:5000 --validator-url http://localhost:8080
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src', 'common'))
+
+from item_rules import RuleEngine  # noqa: E402
+
+# Request mixes (operation -> weight)
+SCENARIOS = {
+    'mixed': {'list': 35, 'get': 25, 'search': 15, 'create': 10, 'update': 5, 'adjust': 10},
+    'reads': {'list': 45, 'get': 35, 'search': 20},
+    'writes': {'create': 40, 'update': 30, 'adjust': 30},
+    'validator': {'validate': 70, 'validate_batch': 30},
+}
+
+# Regressions are judged on these per operation
+COMPARED_METRICS = (('p95_ms', 'lower'), ('p99_ms', 'lower'), ('rps', 'higher'))
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        mix[name.strip()] = float(weight)
+    return mix
+
+
+class Client:
+    """One keep-alive HTTP connection per load thread"""
+
+    def __init__(self, base_url, timeout=30):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self.connection = None
+
+    def request(self, method, path, body=None):
+        headers = {'Accept': 'application/json'}
+        payload = None
+        if body is not None:
+            payload = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(method, path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                return response.status, data
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # Server closed an idle keep-alive connection; reconnect once
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+
+
+class CodeFactory:
+    """Unique item codes that pass the legacy rules"""
+
+    def __init__(self, seed):
+        self.rules = RuleEngine()
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.issued = set()
+
+    def next(self):
+        alphabet = string.ascii_uppercase + string.digits
+        with self.lock:
+            while True:
+                code = self.random.choice(string.ascii_uppercase) + \
+                    ''.join(self.random.choice(alphabet) for _ in range(5))
+                if code not in self.issued and self.rules.check(code)[0]:
+                    self.issued.add(code)
+                    return code
+
+
+class Workload:
+    """The operations of a scenario, each returning (status, ok)"""
+
+    def __init__(self, backend_url, validator_url, codes, item_ids):
+        self.backend_url = backend_url
+        self.validator_url = validator_url
+        self.codes = codes
+        self.item_ids = item_ids
+
+    def run(self, name, clients, rng):
+        backend, validator = clients
+        if name == 'list':
+            status, _ = backend.request('GET', f'/api/inventory?page={rng.randint(1, 5)}&per_page=20')
+        elif name == 'get':
+            status, _ = backend.request('GET', f'/api/inventory/{rng.choice(self.item_ids)}')
+        elif name == 'search':
+            term = rng.choice(self.codes.issued_list)[rng.randint(0, 3):][:3]
+            status, _ = backend.request('GET', f'/api/inventory?search={urllib.parse.quote(term)}')
+        elif name == 'create':
+            code = self.codes.next()
+            status, _ = backend.request('POST', '/api/inventory', {
+                'code': code, 'name': f'Load test {code}', 'quantity': rng.randint(0, 100)
+            })
+        elif name == 'update':
+            status, _ = backend.request('PUT', f'/api/inventory/{rng.choice(self.item_ids)}', {
+                'quantity': rng.randint(0, 1000)
+            })
+        elif name == 'adjust':
+            status, _ = backend.request('POST', f'/api/inventory/{rng.choice(self.item_ids)}/adjust', {
+                'delta': rng.choice((-1, 1, 5))
+            })
+            # Running out of stock is an expected answer, not an error
+            return status, status in (200, 409)
+        elif name == 'validate':
+            status, _ = validator.request('POST', '/validate', {'code': rng.choice(self.codes.issued_list)})
+        elif name == 'validate_batch':
+            batch = [rng.choice(self.codes.issued_list) for _ in range(50)]
+            status, _ = validator.request('POST', '/validate/batch', {'codes': batch})
+        else:
+            raise ValueError(f'Unknown operation: {name}')
+        return status, 200 <= status < 300
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _ in samples)
+    errors = sum(1 for _, ok in samples if not ok)
+    return {
+        'count': len(samples),
+        'errors': errors,
+        'rps': round(len(samples) / elapsed, 2) if elapsed else None,
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+def drive(workload, mix, concurrency, duration, warmup, seed):
+    """Run the mix from concurrency threads; returns ({op: [(latency, ok)]}, measured seconds)"""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    samples = {name: [] for name in names}
+    lock = threading.Lock()
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    def worker(index):
+        rng = random.Random(seed + index)
+        clients = (Client(workload.backend_url), Client(workload.validator_url))
+        local = {name: [] for name in names}
+        try:
+            while True:
+                now = time.perf_counter()
+                if now >= stop_at:
+                    break
+                name = rng.choices(names, weights)[0]
+                began = time.perf_counter()
+                try:
+                    _, ok = workload.run(name, clients, rng)
+                except Exception:
+                    ok = False
+                finished = time.perf_counter()
+                if began >= measure_from:
+                    local[name].append((finished - began, ok))
+        finally:
+            for client in clients:
+                client.close()
+            with lock:
+                for name, values in local.items():
+                    samples[name].extend(values)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, duration
+
+
+def wait_for(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    client = Client(url, timeout=2)
+    while time.monotonic() < deadline:
+        try:
+            status, _ = client.request('GET', '/health')
+            if status == 200:
+                client.close()
+                return
+        except OSError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f'{url} did not become healthy within {timeout}s')
+
+
+def start_services(args, workdir):
+    """Launch the validator and the backend as local subprocesses"""
+    common = os.path.join(ROOT, 'src', 'common')
+    base_env = dict(os.environ)
+    base_env.update({
+        'PYTHONPATH': os.pathsep.join(filter(None, [common, base_env.get('PYTHONPATH')])),
+        'PYTHONUNBUFFERED': '1',
+        'SERVER': args.server,
+        'WEB_CONCURRENCY': str(args.workers),
+        'GUNICORN_THREADS': str(args.threads),
+        'GUNICORN_WORKER_CLASS': args.worker_class,
+    })
+    log_path = os.path.join(workdir, 'services.log')
+    log = open(log_path, 'ab')
+    processes = []
+
+    validator_port = urllib.parse.urlsplit(args.validator_url).port
+    processes.append(subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'src', 'legacy-vm', 'validator.py')],
+        env={**base_env, 'PORT': str(validator_port)},
+        cwd=workdir, stdout=log, stderr=subprocess.STDOUT
+    ))
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    backend_port = urllib.parse.urlsplit(args.backend_url).port
+    processes.append(subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, 'src', 'backend', 'app.py')],
+        env={
+            **base_env,
+            'PORT': str(backend_port),
+            'FLASK_ENV': 'production',
+            'SECRET_KEY': 'loadtest',
+            'DATABASE_URL': database_url,
+            'LEGACY_SERVICE_URL': args.validator_url,
+            'USE_MOCK_VALIDATION': 'true' if args.mock_validation else 'false',
+        },
+        cwd=workdir, stdout=log, stderr=subprocess.STDOUT
+    ))
+
+    try:
+        wait_for(args.validator_url)
+        wait_for(args.backend_url)
+    except RuntimeError:
+        stop_services(processes)
+        print(f'Service start-up failed, see {log_path}', file=sys.stderr)
+        raise
+    return processes, database_url
+
+
+def stop_services(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def seed_items(backend_url, codes, count):
+    """Bulk-import count items and return the ids of everything in the inventory"""
+    client = Client(backend_url, timeout=120)
+    for start in range(0, count, 500):
+        rows = [
+            {'code': codes.next(), 'name': f'Seed item {index}', 'quantity': 1000}
+            for index in range(start, min(count, start + 500))
+        ]
+        status, body = client.request('POST', '/api/inventory/bulk', rows)
+        if status not in (200, 201, 207):
+            raise RuntimeError(f'Seeding failed: HTTP {status} {body[:200]!r}')
+
+    ids = []
+    cursor = ''
+    while True:
+        status, body = client.request('GET', f'/api/inventory?per_page=100&cursor={cursor}')
+        page = json.loads(body)
+        ids.extend(item['id'] for item in page['items'])
+        codes.issued.update(item['code'] for item in page['items'])
+        cursor = page['pagination']['next_cursor']
+        if not cursor:
+            break
+    client.close()
+    return ids
+
+
+def compare(current, baseline, tolerance):
+    """Return a list of regression descriptions for operations present in both runs"""
+    regressions = []
+    pairs = [(name, stats, baseline.get('operations', {}).get(name))
+             for name, stats in current['operations'].items()]
+    if current['meta']['mix'] == baseline.get('meta', {}).get('mix'):
+        pairs.append(('TOTAL', current['overall'], baseline.get('overall')))
+    for name, stats, reference in pairs:
+        if not reference or not stats['count']:
+            continue
+        for metric, better in COMPARED_METRICS:
+            now, before = stats.get(metric), reference.get(metric)
+            if now is None or not before:
+                continue
+            if better == 'lower' and now > before * (1 + tolerance):
+                regressions.append(f'{name} {metric}: {before} -> {now} (+{(now / before - 1) * 100:.0f}%)')
+            if better == 'higher' and now < before * (1 - tolerance):
+                regressions.append(f'{name} {metric}: {before} -> {now} ({(now / before - 1) * 100:.0f}%)')
+    return regressions
+
+
+def print_report(result):
+    print(f"\n{'operation':<16}{'count':>8}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    rows = list(result['operations'].items()) + [('TOTAL', result['overall'])]
+    for name, stats in rows:
+        if not stats['count']:
+            continue
+        print(f"{name:<16}{stats['count']:>8}{stats['errors']:>8}{stats['rps']:>10}"
+              f"{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the inventory backend and legacy validator')
+    parser.add_argument('--scenario', choices=sorted(SCENARIOS), default='mixed')
+    parser.add_argument('--mix', help='custom weights, e.g. "list=50,get=30,adjust=20"')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=30, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before measuring')
+    parser.add_argument('--seed-items', type=int, default=500)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--backend-url', default='http://127.0.0.1:5055')
+    parser.add_argument('--validator-url', default='http://127.0.0.1:8088')
+    parser.add_argument('--external', action='store_true',
+                        help='use already running services at the given URLs instead of starting them')
+    parser.add_argument('--database-url', help='backend DATABASE_URL (default: a temporary SQLite file)')
+    parser.add_argument('--mock-validation', action='store_true', help='backend skips the validator')
+    parser.add_argument('--server', default='gunicorn', choices=('gunicorn', 'development'))
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--worker-class', default='gthread')
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/<time>-<scenario>.json)')
+    parser.add_argument('--baseline', help='compare against this result JSON')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    parser.add_argument('--save-baseline', help='also write this run as a baseline file')
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix) if args.mix else SCENARIOS[args.scenario]
+    workdir = tempfile.mkdtemp(prefix='inventory-loadtest-')
+    processes = []
+    database = args.database_url or 'external' if args.external else None
+    try:
+        if not args.external:
+            processes, database = start_services(args, workdir)
+
+        codes = CodeFactory(args.seed)
+        item_ids = seed_items(args.backend_url, codes, args.seed_items)
+        codes.issued_list = sorted(codes.issued)
+        print(f"Seeded {len(item_ids)} items; running '{args.scenario}' mix {mix} "
+              f"with {args.concurrency} clients for {args.duration}s")
+
+        workload = Workload(args.backend_url, args.validator_url, codes, item_ids)
+        samples, elapsed = drive(workload, mix, args.concurrency, args.duration, args.warmup, args.seed)
+    finally:
+        stop_services(processes)
+
+    result = {
+        'meta': {
+            'timestamp': datetime.utcnow().isoformat(),
+            'revision': git_revision(),
+            'scenario': args.scenario if not args.mix else 'custom',
+            'mix': mix,
+            'concurrency': args.concurrency,
+            'duration_seconds': args.duration,
+            'seed_items': args.seed_items,
+            'database': (database or '').split(':', 1)[0],
+            'server': {'server': args.server, 'workers': args.workers,
+                       'threads': args.threads, 'worker_class': args.worker_class},
+            'mock_validation': args.mock_validation,
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'overall': summarize([sample for values in samples.values() for sample in values], elapsed),
+        'operations': {name: summarize(values, elapsed) for name, values in samples.items()}
+    }
+    print_report(result)
+
+    output = args.output or os.path.join(
+        ROOT, 'benchmarks', 'results', f"{datetime.utcnow():%Y%m%dT%H%M%S}-{result['meta']['scenario']}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'\nResults written to {output}')
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f'Baseline written to {args.save_baseline}')
+
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f'\nRegressions beyond {args.tolerance:.0%} against {args.baseline}:')
+            for line in regressions:
+                print(f'  {line}')
+            return 1
+        print(f'\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,53 +4,62 @@ OpenShift Service Mesh Inventory Demo - Backend API
 A Flask application demonstrating Service Mesh integration with PostgreSQL and legacy VM services.
 """
 
-import os
+# Served by gevent workers by default: patch the standard library before
+# requests, ssl and SQLAlchemy are imported below, not after fork
+if __name__ == '__main__':
+    from serving import patch_for_greenlets
+    patch_for_greenlets(default_worker_class='gevent')
+
+import io
+import csv
+import json
+import zlib
+import base64
+import time
 import logging
-import requests
 import re
-from datetime import datetime
-from flask import Flask, request, jsonify
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import Blueprint, Flask, Response, current_app, request, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from sqlalchemy import text
+from sqlalchemy import text, case, delete, insert, inspect, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from config import get_config
+from caching import ItemCache, create_validation_cache
+from serving import serve
+from search import ItemSearch
+from legacy_client import LegacyClient, CircuitBreaker, CircuitOpenError, ValidationServiceError
+from coalescing import CoalescingTimeout, CoalescingValidator
+from pool_telemetry import PoolTelemetry, instrumented_pool_class
+from readiness import ReadinessMonitor
+from instrumentation import install_metrics
+from request_logging import configure_logging, init_request_logging, logging_stats, parse_sample_rates
+from item_rules import RuleEngine
+from validation_queue import ValidationWorkerPool
+from events import EventBroadcaster, InventoryEvents, stream_events
+from idempotency import IN_PROGRESS, MISMATCH, REPLAY, IdempotencyStore, StoredResponse, request_fingerprint
+from serialization import encoder_name, item_columns, json_response, parse_fields, project_rows
+from response_policy import init_cache_control, init_compression, parse_cache_policies
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
-# Initialize Flask app
-app = Flask(__name__)
-CORS(app)
-
-# Database configuration from environment variables
-DB_HOST = os.getenv('DB_HOST', 'postgres-service')
-DB_PORT = os.getenv('DB_PORT', '5432')
-DB_NAME = os.getenv('DB_NAME', 'inventory')
-DB_USER = os.getenv('DB_USER', 'postgres')
-DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
+# Database handle, bound to an app in create_app()
+db = SQLAlchemy()
 
-# Service Mesh configuration
-LEGACY_SERVICE_URL = os.getenv('LEGACY_SERVICE_URL', 'http://legacy-service:8080')
-USE_MOCK_VALIDATION = os.getenv('USE_MOCK_VALIDATION', 'false').lower() == 'true'
-
-# Flask configuration
-app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
-}
-
-# Initialize database
-db = SQLAlchemy(app)
+# All routes live on this blueprint so the app can be built by a factory
+api = Blueprint('api', __name__)
 
 # Database Models
 class Item(db.Model):
     """Inventory item model"""
     __tablename__ = 'items'
+    __table_args__ = (
+        # Keyset pagination seeks on (created_at, id)
+        db.Index('ix_items_created_at_id', 'created_at', 'id'),
+        # Change feed and list validators read max(updated_at) / seek on it
+        db.Index('ix_items_updated_at_id', 'updated_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     code = db.Column(db.String(10), unique=True, nullable=False, index=True)
@@ -58,6 +67,9 @@ class Item(db.Model):
     quantity = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # active, pending_validation (async mode) or rejected
+    status = db.Column(db.String(20), nullable=False, default='active', server_default='active')
+    validation_message = db.Column(db.String(255))
 
     def to_dict(self):
         """Convert item to dictionary for JSON serialization"""
@@ -66,6 +78,8 @@ class Item(db.Model):
             'code': self.code,
             'name': self.name,
             'quantity': self.quantity,
+            'status': self.status,
+            'validation_message': self.validation_message,
             'created_at': self.created_at.isoformat(),
             'updated_at': self.updated_at.isoformat()
         }
@@ -73,8 +87,129 @@ class Item(db.Model):
     def __repr__(self):
         return f'<Item {self.code}: {self.name}>'
 
+ITEM_STATUSES = ('active', 'pending_validation', 'rejected')
+
+class ItemTombstone(db.Model):
+    """Record of a deleted item, so the change feed can report deletions"""
+    __tablename__ = 'item_tombstones'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, nullable=False)
+    code = db.Column(db.String(10), nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.item_id,
+            'code': self.code,
+            'deleted_at': self.deleted_at.isoformat()
+        }
+
+class ValidationJob(db.Model):
+    """Queued legacy validation for an item created in asynchronous mode"""
+    __tablename__ = 'validation_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey('items.id'), nullable=False, unique=True)
+    code = db.Column(db.String(10), nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    # Workers only claim jobs that are due; failed attempts push this back
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    last_error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class IdempotencyKey(db.Model):
+    """Stored outcome of a POST sent with an Idempotency-Key header"""
+    __tablename__ = 'idempotency_keys'
+    
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # NULL while the first request is still running
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.Text)
+    content_type = db.Column(db.String(100))
+    location = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# Index-backed search on code and name (pg_trgm on PostgreSQL, FTS5 on SQLite)
+item_search = ItemSearch(Item.id, Item.code, Item.name)
+
+# Per-app services created in create_app()
+def get_legacy_client():
+    return current_app.extensions['legacy_client']
+
+def get_validation_cache():
+    return current_app.extensions['validation_cache']
+
+def get_item_rules():
+    return current_app.extensions['item_rules']
+
+def get_item_cache():
+    return current_app.extensions['item_cache']
+
+def idempotent(view):
+    """
+    Honour an Idempotency-Key header on a POST view: the first response for
+    a key is stored and replayed to retries of the same request instead of
+    running the view again. Server errors and conflicts are not stored: they
+    depend on the server or on other requests, so a retry runs again.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return view(*args, **kwargs)
+        key = key.strip()
+        if not key or len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be 1 to 255 characters'}), 400
+        
+        store = current_app.extensions['idempotency']
+        payload = request.get_json(silent=True)
+        fingerprint = request_fingerprint(
+            request.method, request.path, payload if payload is not None else request.get_data(as_text=True)
+        )
+        outcome, stored = store.claim(key, fingerprint)
+        
+        if outcome == REPLAY:
+            response = Response(stored.body, status=stored.status_code, content_type=stored.content_type)
+            if stored.location:
+                response.headers['Location'] = stored.location
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if outcome == MISMATCH:
+            return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+        if outcome == IN_PROGRESS:
+            response = jsonify({'error': 'A request with this Idempotency-Key is still in progress'})
+            response.headers['Retry-After'] = '1'
+            return response, 409
+        
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+        except Exception:
+            store.release(key)
+            raise
+        if response.status_code >= 500 or response.status_code == 409:
+            store.release(key)
+        else:
+            store.complete(key, fingerprint, StoredResponse(
+                response.status_code, response.get_data(as_text=True),
+                response.content_type, response.headers.get('Location')
+            ))
+        return response
+    return wrapper
+
+def publish_change(event_type, **fields):
+    """Emit an inventory event with the current transaction (sent on commit)"""
+    current_app.extensions['inventory_events'].emit(db.session, event_type, **fields)
+
+def invalidate_cached_items(*item_ids):
+    item_cache = get_item_cache()
+    if item_cache is not None:
+        item_cache.invalidate(*item_ids)
+
 # Health Check Endpoints
-@app.route('/health')
+@api.route('/health')
 def health():
     """Health check endpoint for Kubernetes liveness probe"""
     return {
@@ -84,31 +219,48 @@ def health():
         'version': '1.0.0'
     }
 
-@app.route('/ready')
+def legacy_status():
+    """Legacy circuit breaker state - reported, but never fails readiness"""
+    if current_app.config['USE_MOCK_VALIDATION']:
+        return {'mode': 'mock'}
+    return {
+        'mode': 'fallback_to_mock' if current_app.config['LEGACY_FALLBACK_TO_MOCK'] else 'fail_fast',
+        'circuit': get_legacy_client().breaker.snapshot()
+    }
+
+# Compiled once and run on a pooled connection by the readiness monitor
+READINESS_QUERY = text('SELECT 1')
+
+def check_database():
+    with db.engine.connect() as connection:
+        connection.execute(READINESS_QUERY)
+
+@api.route('/ready')
 def ready():
-    """Readiness check endpoint for Kubernetes readiness probe"""
-    try:
-        # Test database connection
-        db.session.execute(text('SELECT 1'))
-        db.session.commit()
-        
-        return {
-            'status': 'ready',
-            'database': 'connected',
-            'timestamp': datetime.utcnow().isoformat()
-        }
-    except Exception as e:
-        logger.error(f"Readiness check failed: {e}")
-        return {
-            'status': 'not ready',
-            'database': 'disconnected',
-            'error': str(e),
-            'timestamp': datetime.utcnow().isoformat()
-        }, 503
+    """Readiness check endpoint for Kubernetes readiness probe (served from the monitor's cache)"""
+    readiness = current_app.extensions['readiness']
+    database = readiness.database_status()
+    result = {
+        'status': 'ready' if database['ok'] else 'not ready',
+        'database': 'connected' if database['ok'] else 'disconnected',
+        'database_check': database,
+        'database_pool': readiness.pool_status(),
+        'legacy_service': legacy_status(),
+        'timestamp': datetime.utcnow().isoformat()
+    }
+    if not database['ok']:
+        result['error'] = database['error']
+        return result, 503
+    return result
 
-@app.route('/info')
+@api.route('/info')
 def info():
     """Service information endpoint"""
+    config = current_app.config
+    validation_cache = get_validation_cache()
+    item_cache = get_item_cache()
+    legacy_coalescer = current_app.extensions['legacy_coalescer']
+    compressor = current_app.extensions['compression']
     return {
         'service': 'inventory-backend',
         'version': '1.0.0',
@@ -116,121 +268,308 @@ def info():
         'features': {
             'service_mesh': True,
             'database': 'postgresql',
-            'legacy_integration': not USE_MOCK_VALIDATION,
-            'mock_validation': USE_MOCK_VALIDATION
+            'legacy_integration': not config['USE_MOCK_VALIDATION'],
+            'mock_validation': config['USE_MOCK_VALIDATION'],
+            'bulk_import': True,
+            'async_validation': config['ASYNC_VALIDATION'],
+            'search': item_search.describe()
         },
         'configuration': {
-            'database_host': DB_HOST,
-            'legacy_service_url': LEGACY_SERVICE_URL if not USE_MOCK_VALIDATION else 'mock',
+            'database_host': config['DB_HOST'],
+            'legacy_service_url': config['LEGACY_SERVICE_URL'] if not config['USE_MOCK_VALIDATION'] else 'mock',
             'cors_enabled': True
+        },
+        'database_pool': current_app.extensions['pool_telemetry'].snapshot(),
+        'validation_cache': validation_cache.stats() if validation_cache is not None else {'enabled': False},
+        'item_cache': item_cache.stats() if item_cache is not None else {'enabled': False},
+        'event_stream': current_app.extensions['inventory_events'].stats(),
+        'idempotency': current_app.extensions['idempotency'].stats(),
+        'json_encoder': encoder_name(),
+        'readiness': current_app.extensions['readiness'].stats(),
+        'logging': logging_stats(),
+        'compression': compressor.stats() if compressor is not None else {'enabled': False},
+        'legacy_coalescing': legacy_coalescer.stats() if legacy_coalescer is not None else {'enabled': False},
+        'validation_queue': {
+            'pending': ValidationJob.query.count(),
+            **current_app.extensions['validation_workers'].stats()
         }
     }
 
 # Validation Functions
 def mock_validate_item_code(code):
-    """Mock validation service for testing without VM"""
-    logger.info(f"Using mock validation for item code: {code}")
+    """Mock validation service for testing without VM - same rules as the legacy validator"""
+    logger.info("Using mock validation for item code: %s", code)
     
-    # Basic validation rules
-    if not code:
-        return False, "Code cannot be empty"
-    
-    if len(code) != 6:
-        return False, "Code must be exactly 6 characters"
-    
-    if not code[0].isalpha():
-        return False, "Code must start with a letter"
-    
-    if not code.isalnum():
-        return False, "Code must contain only letters and numbers"
-    
-    # Reserved prefixes (simulate legacy business rules)
-    reserved_prefixes = ['XX', 'ZZ', 'TEST', 'TEMP', 'DEMO']
-    for prefix in reserved_prefixes:
-        if code.startswith(prefix):
-            return False, f"Code cannot start with reserved prefix: {prefix}"
-    
-    # Simulate some business logic
-    if code.endswith('000'):
-        return False, "Code cannot end with '000' (reserved for system use)"
-    
-    return True, "Valid item code (mock validation)"
+    is_valid, message = get_item_rules().check(code)
+    if is_valid:
+        return True, "Valid item code (mock validation)"
+    return False, message
+
+def mock_validate_item_codes(codes):
+    """Batch form of mock_validate_item_code"""
+    return [
+        (True, "Valid item code (mock validation)") if is_valid else (False, message)
+        for is_valid, message in get_item_rules().check_many(codes)
+    ]
 
 def legacy_validate_item_code(code):
     """Validate item code using legacy VM service through Service Mesh"""
-    try:
-        logger.info(f"Validating item code {code} with legacy service at {LEGACY_SERVICE_URL}")
-        
-        # Call legacy service through Service Mesh
-        response = requests.post(
-            f'{LEGACY_SERVICE_URL}/validate',
-            json={'code': code},
-            timeout=10,
-            headers={
-                'Content-Type': 'application/json',
-                'X-Service-Mesh': 'true'
-            }
-        )
-        
-        if response.status_code == 200:
-            result = response.json()
-            logger.info(f"Legacy validation result: {result}")
-            return result.get('valid', False), result.get('message', 'Unknown validation result')
-        else:
-            logger.error(f"Legacy service returned status {response.status_code}: {response.text}")
-            return False, f"Validation service error: HTTP {response.status_code}"
-            
-    except requests.exceptions.Timeout:
-        logger.error("Legacy validation service timeout")
-        return False, "Validation service timeout - please try again"
-    except requests.exceptions.ConnectionError:
-        logger.error(f"Cannot connect to legacy service at {LEGACY_SERVICE_URL}")
-        return False, "Cannot connect to validation service"
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Legacy validation request failed: {e}")
-        return False, f"Validation service error: {str(e)}"
-    except Exception as e:
-        logger.error(f"Unexpected error in legacy validation: {e}")
-        return False, "Unexpected validation error"
+    coalescer = current_app.extensions['legacy_coalescer']
+    if coalescer is not None:
+        # Shares an in-flight call for the same code (and batches, if configured)
+        try:
+            return coalescer.validate(code)
+        except CoalescingTimeout:
+            raise ValidationServiceError("Validation service timeout - please try again")
+    return get_legacy_client().validate(code)
+
+def legacy_validate_item_codes(codes):
+    """Validate a batch of item codes with a single call to the legacy service"""
+    return get_legacy_client().validate_batch(codes)
 
 def validate_item_code(code):
     """Main validation function - routes to mock or legacy service"""
-    if USE_MOCK_VALIDATION:
+    if current_app.config['USE_MOCK_VALIDATION']:
         return mock_validate_item_code(code)
-    else:
-        return legacy_validate_item_code(code)
+    
+    validation_cache = get_validation_cache()
+    if validation_cache is not None:
+        cached = validation_cache.get(code)
+        if cached is not None:
+            return cached
+    
+    try:
+        is_valid, message = legacy_validate_item_code(code)
+    except CircuitOpenError as e:
+        if current_app.config['LEGACY_FALLBACK_TO_MOCK']:
+            return mock_validate_item_code(code)
+        return False, str(e)
+    except ValidationServiceError as e:
+        # Transient failures are reported but never cached
+        return False, str(e)
+    
+    if validation_cache is not None:
+        validation_cache.set(code, is_valid, message)
+    return is_valid, message
+
+def check_item_codes(codes):
+    """
+    Batch validation that raises ValidationServiceError on transient failures
+    instead of reporting them as invalid codes - for callers that can retry
+    """
+    if not codes:
+        return []
+    if current_app.config['USE_MOCK_VALIDATION']:
+        return mock_validate_item_codes(codes)
+    
+    validation_cache = get_validation_cache()
+    cached = validation_cache.get_many(codes) if validation_cache is not None else {}
+    missing = [code for code in codes if code not in cached]
+    
+    if missing:
+        try:
+            fresh = legacy_validate_item_codes(missing)
+        except CircuitOpenError:
+            if not current_app.config['LEGACY_FALLBACK_TO_MOCK']:
+                raise
+            fresh = mock_validate_item_codes(missing)
+        else:
+            if validation_cache is not None:
+                for code, (is_valid, message) in zip(missing, fresh):
+                    validation_cache.set(code, is_valid, message)
+        cached.update(zip(missing, fresh))
+    
+    return [cached[code] for code in codes]
+
+def parse_item_payload(data):
+    """Normalize and check an item payload, returning (fields, error_message)"""
+    if not isinstance(data, dict) or not all(k in data for k in ['code', 'name', 'quantity']):
+        return None, 'Missing required fields: code, name, quantity'
+    
+    if not isinstance(data['code'], str) or not isinstance(data['name'], str):
+        return None, 'Code and name must be strings'
+    
+    # Extract and validate fields
+    code = data['code'].strip().upper()
+    name = data['name'].strip()
+    quantity = data['quantity']
+    
+    # Basic validation
+    if not code or not name:
+        return None, 'Code and name cannot be empty'
+    
+    if not isinstance(quantity, int) or quantity < 0:
+        return None, 'Quantity must be a non-negative integer'
+    
+    if len(code) > 10:
+        return None, 'Item code cannot exceed 10 characters'
+    
+    if len(name) > 100:
+        return None, 'Item name cannot exceed 100 characters'
+    
+    return {'code': code, 'name': name, 'quantity': quantity}, None
 
 # API Routes
-@app.route('/api/inventory', methods=['GET'])
+def encode_cursor(item):
+    """Opaque keyset cursor for the (created_at, id) position of an item"""
+    raw = f'{item.created_at.isoformat()}|{item.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a keyset cursor into (created_at, id); raises ValueError if malformed"""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    created_at, item_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), int(item_id)
+
+def estimate_total(query, filtered):
+    """
+    Total row count for cursor pagination. On PostgreSQL an unfiltered count
+    comes from the planner statistics (pg_class.reltuples) instead of COUNT(*).
+    Returns (total, is_estimate); total is None when no cheap answer exists.
+    """
+    if db.engine.dialect.name == 'postgresql':
+        if filtered:
+            return None, False
+        reltuples = db.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'items'::regclass")
+        ).scalar()
+        # -1 (or 0 on older releases) means the table has never been analyzed
+        if reltuples and reltuples > 0:
+            return reltuples, True
+    return query.count(), False
+
+def record_deletion(item):
+    """Leave a tombstone for item and prune ones past the retention window"""
+    now = datetime.utcnow()
+    db.session.add(ItemTombstone(item_id=item.id, code=item.code, deleted_at=now))
+    horizon = now - timedelta(days=current_app.config['TOMBSTONE_RETENTION_DAYS'])
+    ItemTombstone.query.filter(ItemTombstone.deleted_at < horizon).delete(synchronize_session=False)
+
+def collection_validators():
+    """
+    ETag and Last-Modified for GET /api/inventory. The collection version is
+    max(updated_at), which every insert and update stamps, plus the latest
+    tombstone, which every delete leaves; both are index lookups, so no
+    COUNT runs per request. Query parameters are folded into the ETag.
+    """
+    last_updated = db.session.execute(select(db.func.max(Item.updated_at))).scalar()
+    last_deleted = db.session.execute(select(db.func.max(ItemTombstone.deleted_at))).scalar()
+    
+    version = f'{last_updated.isoformat() if last_updated else "-"}|' \
+              f'{last_deleted.isoformat() if last_deleted else "-"}|{sorted(request.args.items(multi=True))}'
+    etag = ItemCache.etag_for(version.encode())
+    last_modified = max(filter(None, (last_updated, last_deleted)), default=None)
+    return etag, last_modified
+
+def is_not_modified(etag, last_modified):
+    """Evaluate If-None-Match, or If-Modified-Since when no ETag was sent"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        # Strictly older: a change later in the same second must not get a 304
+        return last_modified < request.if_modified_since.replace(tzinfo=None)
+    return False
+
+def conditional_response(response, etag, last_modified):
+    """Attach validators so clients can poll with conditional requests"""
+    response.set_etag(etag)
+    if last_modified:
+        # HTTP dates have one-second resolution: send the end of the second of
+        # the last change, and only once that second is over, so any later
+        # change is newer than an If-Modified-Since echoing it back
+        end_of_second = last_modified.replace(microsecond=0) + timedelta(seconds=1)
+        if end_of_second <= datetime.utcnow():
+            response.last_modified = end_of_second
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@api.route('/api/inventory', methods=['GET'])
 def get_inventory():
     """Get all inventory items"""
     try:
-        logger.info("Fetching inventory items")
+        logger.debug("Fetching inventory items")
         
         # Get query parameters for pagination and filtering
         page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 50, type=int)
+        per_page = request.args.get('per_page', current_app.config['DEFAULT_PAGE_SIZE'], type=int)
+        per_page = max(1, min(per_page, current_app.config['MAX_PAGE_SIZE']))
         search = request.args.get('search', '').strip()
+        code_prefix = request.args.get('code_prefix', '').strip()
+        status = request.args.get('status', '').strip()
+        cursor = request.args.get('cursor')
+        
+        if status and status not in ITEM_STATUSES:
+            return jsonify({'error': f'status must be one of: {", ".join(ITEM_STATUSES)}'}), 400
+        
+        try:
+            fields = parse_fields(request.args.get('fields', '').strip())
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Build query
-        query = Item.query
+        # Unchanged collection: answer pollers without running the page query
+        etag, last_modified = collection_validators()
+        if is_not_modified(etag, last_modified):
+            return conditional_response(Response(status=304), etag, last_modified)
         
-        # Apply search filter if provided
+        # Build query; rows carry only the selected columns, no ORM instances
+        names, columns = item_columns(Item, fields)
+        query = Item.query.with_entities(*columns)
+        
+        # Apply search filters if provided
         if search:
-            query = query.filter(
-                db.or_(
-                    Item.code.ilike(f'%{search}%'),
-                    Item.name.ilike(f'%{search}%')
-                )
-            )
+            query = item_search.filter(query, search)
+        if code_prefix:
+            query = item_search.prefix_filter(query, code_prefix)
+        if status:
+            query = query.filter(Item.status == status)
+        
+        # Newest first; id breaks ties so the order is total and seekable
+        ordering = (Item.created_at.desc(), Item.id.desc())
+        
+        if cursor is not None:
+            # Keyset pagination: seek past the last row seen on the index
+            # instead of counting and skipping OFFSET rows
+            filtered = query
+            if cursor:
+                try:
+                    position = decode_cursor(cursor)
+                except (ValueError, UnicodeDecodeError):
+                    return jsonify({'error': 'Invalid cursor'}), 400
+                query = query.filter(tuple_(Item.created_at, Item.id) < position)
+            
+            rows = query.order_by(*ordering).limit(per_page + 1).all()
+            has_more = len(rows) > per_page
+            items = rows[:per_page]
+            
+            count_mode = request.args.get('count', 'none')
+            if count_mode == 'exact':
+                total, is_estimate = filtered.count(), False
+            elif count_mode == 'estimate':
+                total, is_estimate = estimate_total(filtered, bool(search or code_prefix or status))
+            else:
+                total, is_estimate = None, False
+            
+            result = {
+                'items': project_rows(items, names, fields),
+                'pagination': {
+                    'per_page': per_page,
+                    'next_cursor': encode_cursor(items[-1]) if has_more else None,
+                    'has_more': has_more,
+                    'total': total,
+                    'total_is_estimate': is_estimate
+                }
+            }
+            
+            logger.info("Returned %d items (cursor page, more: %s)", len(items), has_more)
+            return conditional_response(json_response(result), etag, last_modified)
         
         # Apply pagination and ordering
-        items = query.order_by(Item.created_at.desc()).paginate(
+        items = query.order_by(*ordering).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         result = {
-            'items': [item.to_dict() for item in items.items],
+            'items': project_rows(items.items, names, fields),
             'pagination': {
                 'page': items.page,
                 'pages': items.pages,
@@ -239,51 +578,158 @@ def get_inventory():
             }
         }
         
-        logger.info(f"Returned {len(items.items)} items (page {page} of {items.pages})")
-        return jsonify(result)
+        logger.info("Returned %d items (page %d of %d)", len(items.items), page, items.pages)
+        return conditional_response(json_response(result), etag, last_modified)
         
     except Exception as e:
         logger.error(f"Failed to fetch inventory: {e}")
         return jsonify({'error': 'Failed to fetch inventory'}), 500
 
-@app.route('/api/inventory', methods=['POST'])
-def add_item():
-    """Add new inventory item"""
+@api.route('/api/inventory/changes', methods=['GET'])
+def get_changes():
+    """
+    Delta feed: items created or updated after ?since=<ISO timestamp>, and
+    items deleted since then. Poll again with the returned next_since.
+    next_since stays CHANGES_FEED_LAG seconds behind now, so a write stamped
+    earlier but committed after this poll is still picked up; changes in
+    that window are sent again, and clients apply them by id.
+    """
     try:
-        data = request.get_json()
-        logger.info(f"Adding new item: {data}")
+        since_param = request.args.get('since', '').strip()
+        try:
+            since = datetime.fromisoformat(since_param) if since_param else None
+        except ValueError:
+            return jsonify({'error': 'since must be an ISO 8601 timestamp'}), 400
+        if since is not None and since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        limit = request.args.get('limit', current_app.config['CHANGES_FEED_LIMIT'], type=int)
+        limit = max(1, min(limit, current_app.config['CHANGES_FEED_LIMIT']))
+        # Newest point every write stamped before it is known to have committed by
+        settled = datetime.utcnow() - timedelta(seconds=current_app.config['CHANGES_FEED_LAG'])
         
-        # Validate request data
-        if not data or not all(k in data for k in ['code', 'name', 'quantity']):
+        if since is None:
+            # Bootstrap: clients load the list once, then follow the feed from here
+            _, last_modified = collection_validators()
             return jsonify({
-                'error': 'Missing required fields: code, name, quantity'
-            }), 400
+                'items': [],
+                'deleted': [],
+                'next_since': min(last_modified or settled, settled).isoformat(),
+                'has_more': False
+            })
         
-        # Extract and validate fields
-        code = data['code'].strip().upper()
-        name = data['name'].strip()
-        quantity = data['quantity']
+        horizon = datetime.utcnow() - timedelta(days=current_app.config['TOMBSTONE_RETENTION_DAYS'])
+        if since < horizon:
+            # Deletions older than the tombstone retention are gone - reload the list
+            return jsonify({'error': 'since is older than the change history, reload the inventory'}), 410
         
-        # Basic validation
-        if not code or not name:
-            return jsonify({'error': 'Code and name cannot be empty'}), 400
+        rows = (Item.query
+                .filter(Item.updated_at > since)
+                .order_by(Item.updated_at, Item.id)
+                .limit(limit + 1)
+                .all())
+        has_more = len(rows) > limit
+        if has_more:
+            # Never split rows sharing a timestamp across pages, or the next
+            # page (updated_at > next_since) would skip the rest of them
+            rows = rows[:limit]
+            boundary = rows[-1]
+            rows.extend(Item.query
+                        .filter(Item.updated_at == boundary.updated_at, Item.id > boundary.id)
+                        .order_by(Item.id)
+                        .all())
+            next_since = boundary.updated_at
+        else:
+            next_since = rows[-1].updated_at if rows else since
         
-        if not isinstance(quantity, int) or quantity < 0:
-            return jsonify({'error': 'Quantity must be a non-negative integer'}), 400
+        tombstones = ItemTombstone.query.filter(ItemTombstone.deleted_at > since)
+        if has_more:
+            tombstones = tombstones.filter(ItemTombstone.deleted_at <= next_since)
+        deleted = tombstones.order_by(ItemTombstone.deleted_at).all()
+        if deleted and not has_more:
+            next_since = max(next_since, deleted[-1].deleted_at)
+        if next_since > settled:
+            # Rows past this point may still be joined by uncommitted writes
+            # stamped earlier; resend them next time rather than skip those.
+            # The next poll also continues any page cut short here
+            next_since = max(since, settled)
+            has_more = False
         
-        if len(code) > 10:
-            return jsonify({'error': 'Item code cannot exceed 10 characters'}), 400
+        return jsonify({
+            'items': [item.to_dict() for item in rows],
+            'deleted': [tombstone.to_dict() for tombstone in deleted],
+            'next_since': next_since.isoformat(),
+            'has_more': has_more
+        })
         
-        if len(name) > 100:
-            return jsonify({'error': 'Item name cannot exceed 100 characters'}), 400
+    except Exception as e:
+        logger.error(f"Failed to fetch inventory changes: {e}")
+        return jsonify({'error': 'Failed to fetch inventory changes'}), 500
+
+@api.route('/api/inventory/stream', methods=['GET'])
+def stream_inventory():
+    """Server-Sent Events: created/updated/deleted notifications as they commit"""
+    broadcaster = current_app.extensions['inventory_events'].broadcaster
+    subscription = broadcaster.subscribe()
+    if subscription is None:
+        response = jsonify({'error': 'Too many stream clients, poll /api/inventory/changes instead'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    # No app context or DB session is held while the client is connected
+    events = stream_events(broadcaster, subscription, current_app.config['SSE_HEARTBEAT_INTERVAL'])
+    return Response(events, mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Tell nginx not to buffer the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+@api.route('/api/inventory', methods=['POST'])
+@idempotent
+def add_item():
+    """Add new inventory item"""
+    try:
+        data = request.get_json()
+        
+        # Validate request data
+        fields, error = parse_item_payload(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        code = fields['code']
+        name = fields['name']
+        quantity = fields['quantity']
         
         # Check if item already exists
         existing_item = Item.query.filter_by(code=code).first()
-        if existing_item:
-            return jsonify({
-                'error': f'Item with code {code} already exists',
-                'existing_item': existing_item.to_dict()
-            }), 409
+        replaced_id = None
+        if existing_item and existing_item.status == 'rejected':
+            # A rejected code may be submitted again
+            replaced_id = existing_item.id
+            record_deletion(existing_item)
+            publish_change('deleted', id=existing_item.id, code=existing_item.code)
+            db.session.delete(existing_item)
+            db.session.flush()
+        elif existing_item:
+            return duplicate_code_response(code, existing_item)
+        
+        if wants_async_validation():
+            # Store the item now and let the queue workers validate it
+            new_item = Item(code=code, name=name, quantity=quantity, status='pending_validation')
+            db.session.add(new_item)
+            db.session.flush()
+            db.session.add(ValidationJob(item_id=new_item.id, code=code))
+            publish_change('created', id=new_item.id, item=new_item.to_dict())
+            db.session.commit()
+            if replaced_id:
+                invalidate_cached_items(replaced_id)
+            # Poll now rather than after an idle back-off (and run the workers
+            # at all when async validation is only used per request)
+            current_app.extensions['validation_workers'].wake(drain=not current_app.config['ASYNC_VALIDATION'])
+            
+            logger.info("Queued new item for validation: %s - %s (qty: %s)", code, name, quantity)
+            response = jsonify(new_item.to_dict())
+            response.headers['Location'] = f'/api/inventory/{new_item.id}'
+            return response, 202
         
         # Validate item code with legacy service (or mock)
         is_valid, validation_message = validate_item_code(code)
@@ -294,27 +740,446 @@ def add_item():
         # Create new item
         new_item = Item(code=code, name=name, quantity=quantity)
         db.session.add(new_item)
+        db.session.flush()
+        publish_change('created', id=new_item.id, item=new_item.to_dict())
         db.session.commit()
+        if replaced_id:
+            invalidate_cached_items(replaced_id)
         
-        logger.info(f"Successfully added new item: {code} - {name} (qty: {quantity})")
+        logger.info("Successfully added new item: %s - %s (qty: %s)", code, name, quantity)
         return jsonify(new_item.to_dict()), 201
         
+    except IntegrityError:
+        # A concurrent request inserted the same code after the check above
+        db.session.rollback()
+        logger.warning(f"Item code {code} was added concurrently")
+        return duplicate_code_response(code, Item.query.filter_by(code=code).first())
     except Exception as e:
         db.session.rollback()
         logger.error(f"Failed to add item: {e}")
         return jsonify({'error': 'Failed to add item'}), 500
 
-@app.route('/api/inventory/<int:item_id>', methods=['GET'])
+def duplicate_code_response(code, existing_item):
+    return jsonify({
+        'error': f'Item with code {code} already exists',
+        'existing_item': existing_item.to_dict() if existing_item is not None else None
+    }), 409
+
+def wants_async_validation():
+    """Async mode is on by config, or per request with Prefer: respond-async / ?async=true"""
+    requested = request.args.get('async')
+    if requested is not None:
+        return requested.lower() in ('1', 'true', 'yes')
+    if 'respond-async' in request.headers.get('Prefer', '').lower():
+        return True
+    return current_app.config['ASYNC_VALIDATION']
+
+def claim_validation_jobs(now):
+    """
+    Lease a batch of due jobs to this worker by pushing their available_at
+    past VALIDATION_LEASE_TIMEOUT, so no row lock is held during the legacy
+    call and a worker that dies mid-batch only delays its jobs
+    """
+    config = current_app.config
+    query = (ValidationJob.query
+             .filter(ValidationJob.available_at <= now)
+             .order_by(ValidationJob.available_at, ValidationJob.id)
+             .limit(config['VALIDATION_BATCH_SIZE']))
+    if db.engine.dialect.name == 'postgresql':
+        # Concurrent workers and replicas skip rows another transaction holds
+        query = query.with_for_update(skip_locked=True)
+    
+    lease_until = now + timedelta(seconds=config['VALIDATION_LEASE_TIMEOUT'])
+    claimed = []
+    for job in query.all():
+        # Conditional update: only one worker wins a job even without SKIP LOCKED
+        result = db.session.execute(
+            update(ValidationJob)
+            .where(ValidationJob.id == job.id, ValidationJob.available_at == job.available_at)
+            .values(available_at=lease_until)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            claimed.append((job.id, job.item_id, job.code, job.attempts))
+    db.session.commit()
+    return claimed
+
+def process_validation_batch():
+    """
+    Claim a batch of due validation jobs, validate their codes with one batch
+    call and settle the items. Returns the number of jobs handled.
+    """
+    config = current_app.config
+    jobs = claim_validation_jobs(datetime.utcnow())
+    if not jobs:
+        return 0
+    
+    try:
+        results = check_item_codes([code for _, _, code, _ in jobs])
+    except ValidationServiceError as e:
+        # Transient failure - back off and retry, giving up after VALIDATION_MAX_ATTEMPTS
+        now = datetime.utcnow()
+        for job_id, item_id, code, attempts in jobs:
+            attempts += 1
+            if attempts >= config['VALIDATION_MAX_ATTEMPTS']:
+                settle_validation_job(job_id, item_id, False, f'Validation failed after {attempts} attempts: {e}')
+                continue
+            delay = min(config['VALIDATION_POLL_INTERVAL'] * 2 ** attempts, 300)
+            db.session.execute(
+                update(ValidationJob)
+                .where(ValidationJob.id == job_id)
+                .values(attempts=attempts, last_error=str(e)[:255], available_at=now + timedelta(seconds=delay))
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+        invalidate_cached_items(*[item_id for _, item_id, _, _ in jobs])
+        logger.warning(f"Validation batch of {len(jobs)} deferred: {e}")
+        return len(jobs)
+    
+    for (job_id, item_id, _, _), (is_valid, message) in zip(jobs, results):
+        settle_validation_job(job_id, item_id, is_valid, message)
+    db.session.commit()
+    invalidate_cached_items(*[item_id for _, item_id, _, _ in jobs])
+    
+    logger.info(f"Validated {len(jobs)} queued items")
+    return len(jobs)
+
+def settle_validation_job(job_id, item_id, is_valid, message):
+    """Record the outcome on a pending item and drop its job (the item may have been deleted meanwhile)"""
+    db.session.execute(
+        update(Item)
+        .where(Item.id == item_id, Item.status == 'pending_validation')
+        .values(
+            status='active' if is_valid else 'rejected',
+            validation_message=None if is_valid else str(message)[:255],
+            updated_at=datetime.utcnow()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        delete(ValidationJob)
+        .where(ValidationJob.id == job_id)
+        .execution_options(synchronize_session=False)
+    )
+    publish_change('updated', id=item_id, status='active' if is_valid else 'rejected')
+
+def read_bulk_payload():
+    """Read a bulk import body as a JSON array or NDJSON, returning (rows, error)"""
+    content_type = (request.mimetype or '').lower()
+    
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        rows = []
+        for line in request.get_data(as_text=True).splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                # Keep the row so per-row results still line up with the input
+                rows.append(None)
+        return rows, None
+    
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list):
+        return None, 'Expected a JSON array of items, an object with an "items" array, or NDJSON'
+    return data, None
+
+def import_chunk(chunk, results):
+    """Check, validate and insert one chunk of (index, fields) pairs"""
+    codes = [fields['code'] for _, fields in chunk]
+    
+    # One IN (...) lookup for the whole chunk instead of a SELECT per item
+    existing = {
+        code for (code,) in db.session.query(Item.code).filter(Item.code.in_(codes))
+    }
+    candidates = []
+    for index, fields in chunk:
+        if fields['code'] in existing:
+            results[index] = {
+                'index': index,
+                'code': fields['code'],
+                'status': 'duplicate',
+                'error': f"Item with code {fields['code']} already exists"
+            }
+        else:
+            candidates.append((index, fields))
+    
+    try:
+        validations = check_item_codes([fields['code'] for _, fields in candidates])
+    except ValidationServiceError as e:
+        # An outage (circuit open, timeout, 5xx) says nothing about the codes -
+        # report them as failed, which clients may retry, not as invalid
+        logger.warning("Bulk import could not validate %d codes: %s", len(candidates), e)
+        for index, fields in candidates:
+            results[index] = {
+                'index': index,
+                'code': fields['code'],
+                'status': 'failed',
+                'error': f'Validation service unavailable: {e}'
+            }
+        return
+    rows = []
+    for (index, fields), (is_valid, message) in zip(candidates, validations):
+        if is_valid:
+            rows.append((index, fields))
+        else:
+            results[index] = {
+                'index': index,
+                'code': fields['code'],
+                'status': 'invalid',
+                'error': f'Invalid item code: {message}'
+            }
+    
+    if not rows:
+        return
+    
+    for attempt in range(2):
+        try:
+            # Multi-row INSERT ... RETURNING via SQLAlchemy insertmanyvalues
+            inserted = db.session.execute(
+                insert(Item).returning(Item.id, Item.code),
+                [fields for _, fields in rows]
+            )
+            ids = {code: item_id for item_id, code in inserted}
+            publish_change('bulk_imported', count=len(ids))
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt:
+                raise
+            # Another writer inserted some of these codes after our check
+            taken = {
+                code for (code,) in db.session.query(Item.code).filter(
+                    Item.code.in_([fields['code'] for _, fields in rows])
+                )
+            }
+            logger.warning(f"Bulk import raced with {len(taken)} concurrent inserts, retrying chunk")
+            remaining = []
+            for index, fields in rows:
+                if fields['code'] in taken:
+                    results[index] = {
+                        'index': index,
+                        'code': fields['code'],
+                        'status': 'duplicate',
+                        'error': f"Item with code {fields['code']} already exists"
+                    }
+                else:
+                    remaining.append((index, fields))
+            rows = remaining
+            if not rows:
+                return
+    
+    for index, fields in rows:
+        results[index] = {
+            'index': index,
+            'code': fields['code'],
+            'status': 'created',
+            'id': ids.get(fields['code'])
+        }
+
+@api.route('/api/inventory/bulk', methods=['POST'])
+def bulk_add_items():
+    """Add many inventory items in one request (JSON array or NDJSON)"""
+    started = time.perf_counter()
+    try:
+        rows, error = read_bulk_payload()
+        if error:
+            return jsonify({'error': error}), 400
+        
+        if not rows:
+            return jsonify({'error': 'No items provided'}), 400
+        
+        max_items = current_app.config['BULK_MAX_ITEMS']
+        if len(rows) > max_items:
+            return jsonify({
+                'error': f'Too many items: {len(rows)} (maximum {max_items} per request)'
+            }), 413
+        
+        logger.info(f"Bulk import of {len(rows)} items")
+        
+        results = [None] * len(rows)
+        accepted = []
+        seen_codes = set()
+        for index, data in enumerate(rows):
+            fields, error = parse_item_payload(data)
+            if data is None:
+                results[index] = {'index': index, 'status': 'invalid', 'error': 'Item is not valid JSON'}
+            elif error:
+                results[index] = {'index': index, 'status': 'invalid', 'error': error}
+            elif fields['code'] in seen_codes:
+                results[index] = {
+                    'index': index,
+                    'code': fields['code'],
+                    'status': 'duplicate',
+                    'error': f"Item code {fields['code']} appears more than once in this request"
+                }
+            else:
+                seen_codes.add(fields['code'])
+                accepted.append((index, fields))
+        
+        chunks = 0
+        chunk_size = current_app.config['BULK_CHUNK_SIZE']
+        for start in range(0, len(accepted), chunk_size):
+            chunk = accepted[start:start + chunk_size]
+            chunks += 1
+            try:
+                import_chunk(chunk, results)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Bulk import chunk {chunks} failed: {e}")
+                for index, fields in chunk:
+                    if results[index] is None:
+                        results[index] = {
+                            'index': index,
+                            'code': fields['code'],
+                            'status': 'failed',
+                            'error': 'Failed to add item'
+                        }
+        
+        elapsed = time.perf_counter() - started
+        summary = {'received': len(rows), 'chunks': chunks}
+        for status in ('created', 'duplicate', 'invalid', 'failed'):
+            summary[status] = sum(1 for result in results if result['status'] == status)
+        summary['elapsed_seconds'] = round(elapsed, 3)
+        summary['items_per_second'] = round(len(rows) / elapsed, 1) if elapsed > 0 else None
+        
+        logger.info(
+            f"Bulk import finished: {summary['created']} created, {summary['duplicate']} duplicates, "
+            f"{summary['invalid']} invalid, {summary['failed']} failed in {elapsed:.2f}s"
+        )
+        return jsonify({'summary': summary, 'results': results})
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Bulk import failed: {e}")
+        return jsonify({'error': 'Failed to import items'}), 500
+
+# Status columns last, so existing CSV consumers keep their column positions
+EXPORT_COLUMNS = (
+    'id', 'code', 'name', 'quantity', 'created_at', 'updated_at', 'status', 'validation_message'
+)
+
+def iter_export_batches():
+    """Yield batches of item rows from a server-side cursor, oldest first"""
+    statement = select(
+        Item.id, Item.code, Item.name, Item.quantity, Item.created_at, Item.updated_at,
+        Item.status, Item.validation_message
+    ).order_by(Item.id).execution_options(yield_per=current_app.config['EXPORT_BATCH_SIZE'])
+    
+    result = db.session.execute(statement)
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
+def format_ndjson(batch):
+    lines = []
+    for row in batch:
+        record = dict(zip(EXPORT_COLUMNS, row))
+        record['created_at'] = row.created_at.isoformat()
+        record['updated_at'] = row.updated_at.isoformat()
+        lines.append(json.dumps(record))
+    return '\n'.join(lines) + '\n'
+
+def format_csv(batch):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in batch:
+        writer.writerow([
+            row.id, row.code, row.name, row.quantity,
+            row.created_at.isoformat(), row.updated_at.isoformat(),
+            row.status, row.validation_message
+        ])
+    return buffer.getvalue()
+
+def csv_header():
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    return buffer.getvalue()
+
+@api.route('/api/inventory/export', methods=['GET'])
+def export_inventory():
+    """Stream the full inventory as NDJSON or CSV with constant memory"""
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in ('ndjson', 'csv'):
+        return jsonify({'error': 'Unsupported export format, use ndjson or csv'}), 400
+    compress = request.args.get('gzip', 'false').lower() == 'true'
+    
+    formatter = format_ndjson if export_format == 'ndjson' else format_csv
+    
+    def generate():
+        started = time.perf_counter()
+        exported = 0
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        
+        def emit(chunk):
+            data = chunk.encode('utf-8')
+            return compressor.compress(data) if compressor else data
+        
+        try:
+            if export_format == 'csv':
+                yield emit(csv_header())
+            for batch in iter_export_batches():
+                exported += len(batch)
+                chunk = emit(formatter(batch))
+                if chunk:
+                    yield chunk
+            if compressor:
+                yield compressor.flush()
+            logger.info(f"Exported {exported} items as {export_format} in {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            # Headers are already sent, so the client sees a truncated body
+            logger.error(f"Inventory export failed after {exported} items: {e}")
+            raise
+    
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    headers = {
+        'Content-Disposition': f'attachment; filename=inventory.{export_format}',
+        'Cache-Control': 'no-store'
+    }
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    
+    return Response(stream_with_context(generate()), mimetype=mimetype, headers=headers)
+
+@api.route('/api/inventory/<int:item_id>', methods=['GET'])
 def get_item(item_id):
     """Get specific inventory item"""
     try:
-        item = Item.query.get_or_404(item_id)
-        return jsonify(item.to_dict())
+        # Hot items are served from the serialized-response cache
+        item_cache = get_item_cache()
+        cached = item_cache.get(item_id) if item_cache is not None else None
+        if cached is not None:
+            body, etag = cached
+        elif item_cache is not None:
+            # Taken before the load so a write racing this read is not cached over
+            generation = item_cache.generation()
+            item = Item.query.get_or_404(item_id)
+            body = current_app.json.response(item.to_dict()).get_data()
+            etag = item_cache.set(item_id, body, generation=generation)
+        else:
+            item = Item.query.get_or_404(item_id)
+            body = current_app.json.response(item.to_dict()).get_data()
+            etag = ItemCache.etag_for(body)
+        
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        # Clients may keep the item but must revalidate it with If-None-Match
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     except Exception as e:
         logger.error(f"Failed to fetch item {item_id}: {e}")
         return jsonify({'error': 'Item not found'}), 404
 
-@app.route('/api/inventory/<int:item_id>', methods=['PUT'])
+@api.route('/api/inventory/<int:item_id>', methods=['PUT'])
 def update_item(item_id):
     """Update inventory item"""
     try:
@@ -333,9 +1198,11 @@ def update_item(item_id):
             item.quantity = data['quantity']
         
         item.updated_at = datetime.utcnow()
+        publish_change('updated', id=item.id, item=item.to_dict())
         db.session.commit()
+        invalidate_cached_items(item_id)
         
-        logger.info(f"Updated item {item_id}: {item.code}")
+        logger.info("Updated item %d: %s", item_id, item.code)
         return jsonify(item.to_dict())
         
     except Exception as e:
@@ -343,17 +1210,149 @@ def update_item(item_id):
         logger.error(f"Failed to update item {item_id}: {e}")
         return jsonify({'error': 'Failed to update item'}), 500
 
-@app.route('/api/inventory/<int:item_id>', methods=['DELETE'])
+def parse_delta(value):
+    """Return value as a non-zero int delta, or None"""
+    if isinstance(value, bool) or not isinstance(value, int) or value == 0:
+        return None
+    return value
+
+@api.route('/api/inventory/<int:item_id>/adjust', methods=['POST'])
+@idempotent
+def adjust_item(item_id):
+    """Atomically add a signed delta to an item's quantity (never below zero)"""
+    try:
+        data = request.get_json(silent=True)
+        delta = parse_delta(data.get('delta')) if isinstance(data, dict) else None
+        if delta is None:
+            return jsonify({'error': 'delta must be a non-zero integer'}), 400
+        
+        # One UPDATE ... RETURNING: no read-modify-write, so concurrent
+        # picks and restocks cannot overwrite each other
+        item = db.session.execute(
+            update(Item)
+            .where(Item.id == item_id, Item.quantity + delta >= 0)
+            .values(quantity=Item.quantity + delta, updated_at=datetime.utcnow())
+            .returning(Item)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        
+        if item is None:
+            db.session.rollback()
+            # Only the failure path pays for a second lookup
+            current = db.session.get(Item, item_id)
+            if current is None:
+                return jsonify({'error': 'Item not found'}), 404
+            return jsonify({
+                'error': f'Insufficient quantity: {current.quantity} available, delta {delta}',
+                'item': current.to_dict()
+            }), 409
+        
+        publish_change('updated', id=item.id, item=item.to_dict())
+        db.session.commit()
+        invalidate_cached_items(item_id)
+        
+        logger.info("Adjusted item %d by %s: quantity now %s", item_id, delta, item.quantity)
+        return jsonify(item.to_dict())
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to adjust item {item_id}: {e}")
+        return jsonify({'error': 'Failed to adjust item'}), 500
+
+@api.route('/api/inventory/adjust', methods=['POST'])
+@idempotent
+def adjust_items():
+    """
+    Apply many quantity deltas with a single UPDATE. Body:
+    {"adjustments": [{"id": 1, "delta": -2}, ...], "atomic": false}
+    Adjustments that would go below zero are skipped, or with "atomic": true
+    the whole batch is rolled back and nothing is applied.
+    """
+    try:
+        data = request.get_json(silent=True)
+        adjustments = data.get('adjustments') if isinstance(data, dict) else None
+        if not isinstance(adjustments, list) or not adjustments:
+            return jsonify({'error': 'Expected a non-empty "adjustments" array'}), 400
+        max_items = current_app.config['ADJUST_MAX_ITEMS']
+        if len(adjustments) > max_items:
+            return jsonify({'error': f'Too many adjustments: {len(adjustments)} (maximum {max_items})'}), 413
+        
+        # Several deltas for the same item are combined into one
+        deltas = {}
+        for index, adjustment in enumerate(adjustments):
+            item_id = adjustment.get('id') if isinstance(adjustment, dict) else None
+            delta = parse_delta(adjustment.get('delta')) if isinstance(adjustment, dict) else None
+            if isinstance(item_id, bool) or not isinstance(item_id, int) or delta is None:
+                return jsonify({'error': f'Adjustment {index} needs an integer id and a non-zero integer delta'}), 400
+            deltas[item_id] = deltas.get(item_id, 0) + delta
+        
+        # quantity + CASE id WHEN ... END works on PostgreSQL and SQLite alike
+        delta_for = case(deltas, value=Item.id, else_=0)
+        updated = db.session.execute(
+            update(Item)
+            .where(Item.id.in_(list(deltas)), Item.quantity + delta_for >= 0)
+            .values(quantity=Item.quantity + delta_for, updated_at=datetime.utcnow())
+            .returning(Item.id, Item.quantity)
+            .execution_options(synchronize_session=False)
+        ).all()
+        quantities = dict(updated)
+        
+        skipped = [item_id for item_id in deltas if item_id not in quantities]
+        if skipped and data.get('atomic'):
+            db.session.rollback()
+            return jsonify({'error': 'Adjustments rejected, nothing applied', 'failed_ids': skipped}), 409
+        
+        failures = {}
+        if skipped:
+            existing = {
+                item_id for (item_id,) in db.session.query(Item.id).filter(Item.id.in_(skipped))
+            }
+            failures = {
+                item_id: 'insufficient_quantity' if item_id in existing else 'not_found'
+                for item_id in skipped
+            }
+        
+        if quantities:
+            publish_change('adjusted', ids=sorted(quantities))
+        db.session.commit()
+        invalidate_cached_items(*quantities)
+        
+        logger.info(f"Adjusted {len(quantities)} items in one statement, {len(failures)} skipped")
+        return jsonify({
+            'summary': {
+                'requested': len(deltas),
+                'applied': len(quantities),
+                'failed': len(failures)
+            },
+            'results': [
+                {'id': item_id, 'delta': delta, 'status': 'applied', 'quantity': quantities[item_id]}
+                if item_id in quantities else
+                {'id': item_id, 'delta': delta, 'status': failures[item_id]}
+                for item_id, delta in deltas.items()
+            ]
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Failed to adjust items: {e}")
+        return jsonify({'error': 'Failed to adjust items'}), 500
+
+@api.route('/api/inventory/<int:item_id>', methods=['DELETE'])
 def delete_item(item_id):
     """Delete inventory item"""
     try:
         item = Item.query.get_or_404(item_id)
         item_code = item.code
         
+        # Drop any queued validation for a still-pending item
+        ValidationJob.query.filter_by(item_id=item_id).delete()
+        record_deletion(item)
+        publish_change('deleted', id=item.id, code=item_code)
         db.session.delete(item)
         db.session.commit()
+        invalidate_cached_items(item_id)
         
-        logger.info(f"Deleted item {item_id}: {item_code}")
+        logger.info("Deleted item %d: %s", item_id, item_code)
         return jsonify({'message': f'Item {item_code} deleted successfully'})
         
     except Exception as e:
@@ -362,21 +1361,242 @@ def delete_item(item_id):
         return jsonify({'error': 'Failed to delete item'}), 500
 
 # Error Handlers
-@app.errorhandler(404)
+@api.app_errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Not found'}), 404
 
-@app.errorhandler(500)
+@api.app_errorhandler(500)
 def internal_error(error):
     db.session.rollback()
     return jsonify({'error': 'Internal server error'}), 500
 
+# Application factory
+def create_app(config_class=None):
+    """Build the Flask app from a config.py class (get_config() by default)"""
+    config_class = config_class or get_config()
+    config_class.validate()
+    
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    
+    # Configure logging
+    configure_logging(
+        'inventory-backend',
+        level=app.config['LOG_LEVEL'],
+        output=app.config['LOG_OUTPUT'],
+        queue_size=app.config['LOG_QUEUE_SIZE'],
+        text_format=app.config['LOG_FORMAT']
+    )
+    
+    CORS(app, origins=app.config['CORS_ORIGINS'])
+    
+    # Pool telemetry replaces pool_pre_ping with an idle-interval ping it can time
+    telemetry = PoolTelemetry(pre_ping_interval=app.config['DB_PRE_PING_INTERVAL'])
+    engine_options = dict(app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+    if 'pool_size' in engine_options and 'poolclass' not in engine_options:
+        engine_options['poolclass'] = instrumented_pool_class(telemetry)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+    
+    db.init_app(app)
+    with app.app_context():
+        telemetry.install(db.engine)
+    app.extensions['pool_telemetry'] = telemetry
+    
+    # Cached database health for /ready, refreshed per worker process
+    app.extensions['readiness'] = ReadinessMonitor(
+        app, check_database, telemetry,
+        interval=app.config['READINESS_CHECK_INTERVAL'],
+        max_age=app.config['READINESS_MAX_AGE']
+    )
+    
+    # Pooled client for the legacy VM service
+    app.extensions['legacy_client'] = LegacyClient(
+        app.config['LEGACY_SERVICE_URL'],
+        timeout=app.config['LEGACY_SERVICE_TIMEOUT'],
+        connect_timeout=app.config['LEGACY_SERVICE_CONNECT_TIMEOUT'],
+        pool_size=app.config['LEGACY_POOL_SIZE'],
+        breaker=CircuitBreaker(
+            failure_threshold=app.config['LEGACY_CIRCUIT_FAILURE_THRESHOLD'],
+            reset_timeout=app.config['LEGACY_CIRCUIT_RESET_TIMEOUT']
+        ),
+        headers={
+            'Content-Type': 'application/json',
+            **app.config['SERVICE_MESH_HEADERS']
+        }
+    )
+    
+    # Concurrent validations of the same code share one legacy call; with a
+    # batch window, distinct codes are also grouped into /validate/batch calls
+    legacy_client = app.extensions['legacy_client']
+    app.extensions['legacy_coalescer'] = CoalescingValidator(
+        legacy_client.validate, legacy_client.validate_batch,
+        window=app.config['LEGACY_BATCH_WINDOW_MS'] / 1000,
+        max_batch=app.config['LEGACY_BATCH_MAX_SIZE'],
+        # Wait for a shared call no longer than for a call of our own
+        timeout=app.config['LEGACY_SERVICE_CONNECT_TIMEOUT'] + app.config['LEGACY_SERVICE_TIMEOUT']
+                + app.config['LEGACY_BATCH_WINDOW_MS'] / 1000
+    ) if app.config['LEGACY_COALESCING_ENABLED'] else None
+    
+    # Item code rules shared with the legacy validator (used by mock validation)
+    app.extensions['item_rules'] = RuleEngine(rules_file=app.config['LEGACY_RULES_FILE'])
+    
+    # Serialized responses for GET /api/inventory/<id>
+    app.extensions['item_cache'] = ItemCache(
+        max_size=app.config['ITEM_CACHE_SIZE'],
+        ttl=app.config['ITEM_CACHE_TTL']
+    ) if app.config['ITEM_CACHE_ENABLED'] else None
+    
+    # Legacy validation result cache
+    app.extensions['validation_cache'] = create_validation_cache(
+        app.config['RATELIMIT_STORAGE_URL'],
+        max_size=app.config['VALIDATION_CACHE_SIZE'],
+        valid_ttl=app.config['VALIDATION_CACHE_VALID_TTL'],
+        invalid_ttl=app.config['VALIDATION_CACHE_INVALID_TTL']
+    ) if app.config['VALIDATION_CACHE_ENABLED'] else None
+    
+    # Background workers for the asynchronous validation queue, started in
+    # each worker process (never the master) by start_background_workers(),
+    # or on demand when a request queues a job
+    app.extensions['validation_workers'] = ValidationWorkerPool(
+        app, process_validation_batch,
+        workers=app.config['VALIDATION_WORKERS'],
+        poll_interval=app.config['VALIDATION_POLL_INTERVAL'],
+        max_poll_interval=app.config['VALIDATION_MAX_POLL_INTERVAL'],
+        has_pending=lambda: db.session.query(ValidationJob.id).first() is not None
+    )
+    
+    # Stored responses for Idempotency-Key replays
+    app.extensions['idempotency'] = IdempotencyStore(
+        db.session, IdempotencyKey,
+        ttl=app.config['IDEMPOTENCY_TTL'],
+        lock_timeout=app.config['IDEMPOTENCY_LOCK_TIMEOUT'],
+        cache_size=app.config['IDEMPOTENCY_CACHE_SIZE']
+    )
+    
+    # Change notifications for /api/inventory/stream; every delivered event
+    # also drops the item from this process's response cache
+    def invalidate_from_event(item):
+        item_cache = app.extensions['item_cache']
+        if item_cache is not None:
+            item_cache.invalidate(*([item['id']] if 'id' in item else item.get('ids', [])))
+    
+    # A stream holds a request thread for as long as its client is connected
+    # unless the workers are greenlets: leave at least half of them to the API
+    sse_max_clients = app.config['SSE_MAX_CLIENTS']
+    if not gevent_active():
+        sse_max_clients = min(sse_max_clients, max(1, app.config['GUNICORN_THREADS'] // 2))
+    
+    app.extensions['inventory_events'] = InventoryEvents(
+        EventBroadcaster(
+            buffer_size=app.config['SSE_CLIENT_BUFFER'],
+            max_clients=sse_max_clients
+        ),
+        channel=app.config['INVENTORY_EVENTS_CHANNEL'],
+        on_event=invalidate_from_event
+    )
+    
+    app.register_blueprint(api)
+    
+    # Request ids from the mesh's x-request-id on every log line, per-route sampling
+    init_request_logging(
+        app,
+        sample_rates=parse_sample_rates(app.config['LOG_SAMPLE_RATES']),
+        default_rate=app.config['LOG_SAMPLE_RATE']
+    )
+    
+    # Compression of finished bodies and Cache-Control for responses that set
+    # none (after_request hooks run in reverse, so compression runs last of the two)
+    app.extensions['compression'] = init_compression(
+        app,
+        level=app.config['COMPRESSION_LEVEL'],
+        brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'],
+        min_size=app.config['COMPRESSION_MIN_SIZE']
+    ) if app.config['COMPRESSION_ENABLED'] else None
+    init_cache_control(
+        app,
+        parse_cache_policies(app.config['CACHE_CONTROL_POLICIES']),
+        default_policy=app.config['CACHE_CONTROL_DEFAULT']
+    )
+    
+    # Prometheus /metrics: route latency, DB time, legacy calls, caches
+    with app.app_context():
+        app.extensions['metrics'] = install_metrics(app, db.engine)
+    return app
+
+def create_worker_app():
+    """
+    The app of one serving process, built by serve() after fork. Under the
+    gevent worker this runs after monkey-patching, so the connection pool,
+    HTTP session and cache locks are created greenlet-aware; an app built in
+    the master would keep native locks and a greenlet waiting for a pooled
+    connection would block every other greenlet of its worker.
+    """
+    if gevent_active():
+        # Let psycopg2 yield to other greenlets while it waits on PostgreSQL
+        try:
+            from psycogreen.gevent import patch_psycopg
+            patch_psycopg()
+        except ImportError:
+            logger.warning("psycogreen not installed, database calls will block the gevent worker")
+    worker_app = create_app()
+    start_background_workers(worker_app)
+    return worker_app
+
+def start_background_workers(app):
+    """Per-process background work: queue workers, readiness checks, event listener"""
+    workers = app.extensions['validation_workers']
+    if app.config['ASYNC_VALIDATION']:
+        workers.start()
+    else:
+        # Only jobs queued by per-request async (or left by earlier runs) need workers
+        with app.app_context():
+            pending = workers.has_pending()
+        if pending:
+            workers.start(drain=True)
+    app.extensions['readiness'].start()
+    with app.app_context():
+        app.extensions['inventory_events'].start_listener(db.engine)
+
+def gevent_active():
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
 # Database initialization
-def create_tables():
+def add_missing_columns():
+    """create_all() never alters existing tables - add columns introduced since"""
+    inspector = inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=db.engine.dialect)
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'
+            if column.server_default is not None:
+                ddl += f" DEFAULT '{column.server_default.arg}'"
+                if not column.nullable:
+                    ddl += ' NOT NULL'
+            with db.engine.begin() as connection:
+                connection.execute(text(ddl))
+            logger.info(f"Added column {table.name}.{column.name}")
+
+def create_tables(app):
     """Create database tables if they don't exist"""
     try:
         with app.app_context():
             db.create_all()
+            add_missing_columns()
+            # create_all() skips tables that already exist, so add any
+            # indexes introduced since the table was first created
+            for table in db.metadata.sorted_tables:
+                for index in table.indexes:
+                    index.create(bind=db.engine, checkfirst=True)
+            item_search.setup(db.engine)
             logger.info("Database tables created successfully")
     except Exception as e:
         logger.error(f"Failed to create database tables: {e}")
@@ -384,18 +1604,20 @@ def create_tables():
 
 # Application startup
 if __name__ == '__main__':
-    # Create database tables
-    create_tables()
+    # Create database tables (with an app used only for that - see below)
+    app = create_app()
+    create_tables(app)
     
     # Log startup information
     logger.info("Starting OpenShift Service Mesh Inventory Demo Backend")
-    logger.info(f"Database: postgresql://{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}")
-    logger.info(f"Legacy service: {LEGACY_SERVICE_URL}")
-    logger.info(f"Mock validation: {USE_MOCK_VALIDATION}")
-    
-    # Start Flask development server
-    app.run(
-        host='0.0.0.0',
-        port=5000,
-        debug=os.getenv('FLASK_DEBUG', 'false').lower() == 'true'
-    )
\ No newline at end of file
+    with app.app_context():
+        logger.info(f"Database: {db.engine.url.render_as_string(hide_password=True)}")
+        # Workers build their own app and engine - don't leave them this one's connections
+        db.engine.dispose()
+    logger.info(f"Legacy service: {app.config['LEGACY_SERVICE_URL']}")
+    logger.info(f"Mock validation: {app.config['USE_MOCK_VALIDATION']}")
+    
+    # Start gunicorn (or the Flask development server with SERVER=development).
+    # This process only set up the database; each worker builds its own app
+    # after fork and runs its own queue workers and event listener
+    serve(create_worker_app, default_port=5000, lazy=True, default_worker_class='gevent')
@@ -0,0 +1,253 @@
+"""
+OpenShift Service Mesh Inventory Demo - Backend Caching
+In-process LRU caches, the legacy validation result cache and the item response cache
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Sentinel for cache misses so that falsy values can still be cached
+MISSING = object()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a size limit and optional per-entry TTL"""
+
+    def __init__(self, max_size=1024, default_ttl=None):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for key, or default if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entries"""
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        """Remove key from the cache if present"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None
+        }
+
+
+class RedisStore:
+    """Minimal key/value store on Redis, shared by all backend replicas"""
+
+    def __init__(self, client, prefix):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key, default=MISSING):
+        try:
+            raw = self.client.get(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Redis cache read failed: {e}")
+            return default
+        return default if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl=None):
+        try:
+            if ttl:
+                self.client.setex(self.prefix + key, int(ttl), json.dumps(value))
+            else:
+                self.client.set(self.prefix + key, json.dumps(value))
+        except Exception as e:
+            logger.warning(f"Redis cache write failed: {e}")
+
+    def delete(self, key):
+        try:
+            self.client.delete(self.prefix + key)
+        except Exception as e:
+            logger.warning(f"Redis cache delete failed: {e}")
+
+    def stats(self):
+        return {'size': None, 'max_size': None, 'evictions': None}
+
+
+class ValidationCache:
+    """Caches legacy validation results with separate TTLs for valid and invalid codes"""
+
+    def __init__(self, store, valid_ttl=300, invalid_ttl=60, backend='memory'):
+        self.store = store
+        self.valid_ttl = valid_ttl
+        self.invalid_ttl = invalid_ttl
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, code):
+        """Return a cached (is_valid, message) tuple, or None"""
+        value = self.store.get(code)
+        if value is MISSING:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value[0], value[1]
+
+    def get_many(self, codes):
+        """Return {code: (is_valid, message)} for the codes that are cached"""
+        found = {}
+        for code in codes:
+            result = self.get(code)
+            if result is not None:
+                found[code] = result
+        return found
+
+    def set(self, code, is_valid, message):
+        """Cache a definitive validation result"""
+        ttl = self.valid_ttl if is_valid else self.invalid_ttl
+        if ttl > 0:
+            self.store.set(code, [is_valid, message], ttl=ttl)
+
+    def stats(self):
+        """Return hit/miss counters for /info"""
+        lookups = self.hits + self.misses
+        store_stats = self.store.stats()
+        return {
+            'enabled': True,
+            'backend': self.backend,
+            'size': store_stats['size'],
+            'max_size': store_stats['max_size'],
+            'evictions': store_stats['evictions'],
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+            'valid_ttl_seconds': self.valid_ttl,
+            'invalid_ttl_seconds': self.invalid_ttl
+        }
+
+
+class ItemCache:
+    """
+    Serialized item responses keyed by item id, with their ETags.
+    Entries are dropped on every write to the item; the TTL bounds how long
+    another worker process or replica can serve a copy it did not invalidate.
+
+    A read that loaded the row before a concurrent write must not put the
+    old body back after the writer's invalidate(). Readers take generation()
+    before loading and pass it to set(), which refuses to store an item
+    invalidated since then. Every invalidation advances the generation and
+    stamps the item with it; only the latest max_size stamps are kept, and
+    ids whose stamp was dropped count as invalidated at the newest dropped
+    stamp, which errs on the side of not caching.
+    """
+
+    def __init__(self, max_size=1000, ttl=30):
+        self.entries = LRUCache(max_size=max_size, default_ttl=ttl)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._invalidated = OrderedDict()
+        self._invalidated_limit = max_size
+        self._invalidated_floor = 0
+        self.stale_sets = 0
+
+    @staticmethod
+    def etag_for(body):
+        """Strong validator derived from the serialized bytes"""
+        return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+    def get(self, item_id):
+        """Return (body, etag) for a cached item, or None"""
+        entry = self.entries.get(item_id)
+        return None if entry is MISSING else entry
+
+    def generation(self):
+        """Token to take before loading an item, for set()"""
+        return self._generation
+
+    def set(self, item_id, body, generation=None):
+        """
+        Cache the serialized item and return its ETag. With generation, the
+        body is not stored if the item was invalidated after it was taken.
+        """
+        etag = self.etag_for(body)
+        with self._lock:
+            if generation is not None and \
+                    self._invalidated.get(item_id, self._invalidated_floor) > generation:
+                self.stale_sets += 1
+                return etag
+            self.entries.set(item_id, (body, etag))
+        return etag
+
+    def invalidate(self, *item_ids):
+        with self._lock:
+            for item_id in item_ids:
+                self._generation += 1
+                self._invalidated[item_id] = self._generation
+                self._invalidated.move_to_end(item_id)
+                self.entries.delete(item_id)
+            while len(self._invalidated) > self._invalidated_limit:
+                _, self._invalidated_floor = self._invalidated.popitem(last=False)
+
+    def stats(self):
+        return {'enabled': True, 'ttl_seconds': self.ttl, 'stale_sets': self.stale_sets, **self.entries.stats()}
+
+
+def create_validation_cache(storage_url, max_size, valid_ttl, invalid_ttl):
+    """Build a validation cache on Redis when storage_url points at one, else in memory"""
+    if storage_url and storage_url.startswith(('redis://', 'rediss://')):
+        try:
+            import redis
+            client = redis.Redis.from_url(storage_url, socket_timeout=0.5)
+            store = RedisStore(client, prefix='inventory:validation:')
+            logger.info("Validation cache using shared Redis backend")
+            return ValidationCache(store, valid_ttl, invalid_ttl, backend='redis')
+        except ImportError:
+            logger.warning("redis package not installed, falling back to in-memory validation cache")
+
+    store = LRUCache(max_size=max_size)
+    return ValidationCache(store, valid_ttl, invalid_ttl, backend='memory')
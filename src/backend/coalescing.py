@@ -0,0 +1,201 @@
+"""
+OpenShift Service Mesh Inventory Demo - Legacy Call Coalescing
+Single-flight deduplication and micro-batching of legacy validations
+
+When the same code is validated by several requests at once (a burst of
+identical submissions, a client retrying), only the first request calls
+the legacy service; the others wait for that call and share its result or
+its error. With LEGACY_BATCH_WINDOW_MS set, distinct codes arriving within
+that window are also collected and sent as one /validate/batch call. Only
+calls that are in flight are shared - a result is never kept after its
+call completes, so coalescing cannot serve stale validations (that is the
+validation cache's job, with its own TTLs). A waiter gives up after timeout
+seconds with CoalescingTimeout, however long the call it shares takes.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class CoalescingTimeout(TimeoutError):
+    """A shared call did not complete within the waiter's timeout"""
+
+
+class _Call:
+    """One in-flight call and the threads waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def resolve(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+    def wait(self, timeout=None):
+        if not self.done.wait(timeout):
+            raise CoalescingTimeout(f"Shared call did not complete within {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Concurrent do() calls with the same key share one execution of fn"""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.shared = 0
+        self.timeouts = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                call.resolve(result=fn())
+            except Exception as e:
+                call.resolve(error=e)
+            finally:
+                with self._lock:
+                    del self._calls[key]
+            return call.wait()
+        try:
+            return call.wait(self.timeout)
+        except CoalescingTimeout:
+            self.timeouts += 1
+            raise
+
+
+class MicroBatcher:
+    """
+    Collects keys submitted within window seconds and resolves them with
+    one call_batch(keys) call, which returns results in key order. The
+    first submitter of a batch waits out the window and runs the call (no
+    background thread); a batch reaching max_batch is sent at once by the
+    thread that filled it. A key that is already pending or in flight is
+    not sent again - its submitters share that call's result. Submitters
+    whose batch another thread runs wait at most timeout seconds for it.
+    """
+
+    def __init__(self, call_batch, window=0.005, max_batch=100, timeout=None):
+        self.call_batch = call_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self._pending = None
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.keys = 0
+        self.shared = 0
+        self.largest = 0
+        self.timeouts = 0
+
+    def submit(self, key):
+        batch, leader = None, False
+        with self._lock:
+            call = self._in_flight.get(key)
+            if call is not None:
+                self.shared += 1
+            else:
+                leader = self._pending is None
+                if leader:
+                    self._pending = {}
+                call = self._pending.get(key)
+                if call is not None:
+                    self.shared += 1
+                else:
+                    call = self._pending[key] = _Call()
+                if len(self._pending) >= self.max_batch:
+                    batch, leader = self._detach(), False
+
+        if leader:
+            # Send whatever has arrived once the window closes, unless a
+            # thread that filled the batch has sent it already (and then
+            # return as soon as its results are in)
+            call.done.wait(self.window)
+            with self._lock:
+                if self._pending is not None and key in self._pending:
+                    batch = self._detach()
+        if batch:
+            self._run(batch)
+            return call.wait()
+        try:
+            return call.wait(self.timeout)
+        except CoalescingTimeout:
+            self.timeouts += 1
+            raise
+
+    def _detach(self):
+        """Move the pending batch to in flight (caller holds the lock)"""
+        batch, self._pending = self._pending, None
+        self._in_flight.update(batch)
+        self.batches += 1
+        self.keys += len(batch)
+        self.largest = max(self.largest, len(batch))
+        return batch
+
+    def _run(self, batch):
+        keys = list(batch)
+        try:
+            results = self.call_batch(keys)
+        except Exception as e:
+            results, error = [None] * len(keys), e
+        else:
+            error = None
+        with self._lock:
+            for key in keys:
+                if self._in_flight.get(key) is batch[key]:
+                    del self._in_flight[key]
+        for key, result in zip(keys, results):
+            batch[key].resolve(result=result, error=error)
+
+
+class CoalescingValidator:
+    """Legacy validations of normalized codes through single-flight, optionally micro-batched"""
+
+    def __init__(self, validate, validate_batch, window=0.0, max_batch=100, timeout=None):
+        self.validate_one = validate
+        self.flight = SingleFlight(timeout)
+        self.batcher = MicroBatcher(validate_batch, window, max_batch, timeout) if window > 0 else None
+
+    def validate(self, code):
+        key = code.strip().upper()
+        if self.batcher is not None:
+            # In-flight sharing of a batch covers single-flight as well
+            return self.batcher.submit(key)
+        return self.flight.do(key, lambda: self.validate_one(key))
+
+    def stats(self):
+        stats = {
+            'mode': 'micro_batch' if self.batcher is not None else 'single_flight',
+            'legacy_calls': self.flight.calls,
+            'shared_results': self.flight.shared,
+            'wait_timeouts': self.flight.timeouts
+        }
+        if self.batcher is not None:
+            stats.update({
+                'window_ms': round(self.batcher.window * 1000, 3),
+                'max_batch': self.batcher.max_batch,
+                'legacy_calls': self.batcher.batches,
+                'shared_results': self.batcher.shared,
+                'wait_timeouts': self.batcher.timeouts,
+                'batched_codes': self.batcher.keys,
+                'largest_batch': self.batcher.largest
+            })
+        return stats
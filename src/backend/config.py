@@ -22,17 +22,33 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'postgres')
     
-    # SQLAlchemy configuration
-    SQLALCHEMY_DATABASE_URI = f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    # Server sizing (see serving.py) - every worker process owns its own DB pool
+    WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', '2'))
+    GUNICORN_THREADS = int(os.getenv('GUNICORN_THREADS', '4'))
+    
+    # Per-worker pool: one connection per request thread plus a small overflow,
+    # so a pod holds at most WEB_CONCURRENCY * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', str(GUNICORN_THREADS)))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '2'))
+    
+    # SQLAlchemy configuration (DATABASE_URL overrides the DB_* settings)
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'DATABASE_URL', f'postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
+        # Liveness of pooled connections is checked by pool_telemetry.py
+        # on idle connections only, instead of a round trip per checkout
+        'pool_pre_ping': False,
         'pool_recycle': 300,
         'pool_timeout': 20,
-        'max_overflow': 0,
-        'pool_size': 10
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_size': DB_POOL_SIZE
     }
     
+    # Ping connections idle longer than this many seconds on checkout (0 = always)
+    DB_PRE_PING_INTERVAL = float(os.getenv('DB_PRE_PING_INTERVAL', '30'))
+    
     # Service Mesh and legacy service configuration
     LEGACY_SERVICE_URL = os.getenv('LEGACY_SERVICE_URL', 'http://legacy-service:8080')
     USE_MOCK_VALIDATION = os.getenv('USE_MOCK_VALIDATION', 'false').lower() == 'true'
@@ -43,21 +59,115 @@ class Config:
     API_DESCRIPTION = 'Inventory management API demonstrating Service Mesh integration'
     
     # Pagination defaults
-    DEFAULT_PAGE_SIZE = 20
-    MAX_PAGE_SIZE = 100
+    DEFAULT_PAGE_SIZE = int(os.getenv('DEFAULT_PAGE_SIZE', '20'))
+    MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', '100'))
     
     # Request timeout settings
     LEGACY_SERVICE_TIMEOUT = int(os.getenv('LEGACY_SERVICE_TIMEOUT', '10'))
+    LEGACY_SERVICE_CONNECT_TIMEOUT = float(os.getenv('LEGACY_SERVICE_CONNECT_TIMEOUT', '2'))
+    
+    # Legacy client connection pool and circuit breaker
+    LEGACY_POOL_SIZE = int(os.getenv('LEGACY_POOL_SIZE', '10'))
+    LEGACY_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('LEGACY_CIRCUIT_FAILURE_THRESHOLD', '5'))
+    LEGACY_CIRCUIT_RESET_TIMEOUT = int(os.getenv('LEGACY_CIRCUIT_RESET_TIMEOUT', '30'))
+    LEGACY_FALLBACK_TO_MOCK = os.getenv('LEGACY_FALLBACK_TO_MOCK', 'false').lower() == 'true'
+    
+    # Concurrent validations of the same code share one in-flight legacy call.
+    # A batch window > 0 also groups distinct codes arriving within that many
+    # milliseconds into one /validate/batch call (adds up to the window to each)
+    LEGACY_COALESCING_ENABLED = os.getenv('LEGACY_COALESCING_ENABLED', 'true').lower() == 'true'
+    LEGACY_BATCH_WINDOW_MS = float(os.getenv('LEGACY_BATCH_WINDOW_MS', '0'))
+    LEGACY_BATCH_MAX_SIZE = int(os.getenv('LEGACY_BATCH_MAX_SIZE', '100'))
+    
+    # Optional JSON file overriding the built-in item code rules (reloaded on change)
+    LEGACY_RULES_FILE = os.getenv('LEGACY_RULES_FILE')
+    
+    # Validation cache settings (shares RATELIMIT_STORAGE_URL when it points at Redis)
+    VALIDATION_CACHE_ENABLED = os.getenv('VALIDATION_CACHE_ENABLED', 'true').lower() == 'true'
+    VALIDATION_CACHE_SIZE = int(os.getenv('VALIDATION_CACHE_SIZE', '10000'))
+    VALIDATION_CACHE_VALID_TTL = int(os.getenv('VALIDATION_CACHE_VALID_TTL', '300'))
+    VALIDATION_CACHE_INVALID_TTL = int(os.getenv('VALIDATION_CACHE_INVALID_TTL', '60'))
+    
+    # Item response cache for GET /api/inventory/<id> (per worker process)
+    ITEM_CACHE_ENABLED = os.getenv('ITEM_CACHE_ENABLED', 'true').lower() == 'true'
+    ITEM_CACHE_SIZE = int(os.getenv('ITEM_CACHE_SIZE', '1000'))
+    ITEM_CACHE_TTL = int(os.getenv('ITEM_CACHE_TTL', '30'))
+    
+    # Streaming export settings (rows fetched per server-side cursor round trip)
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+    
+    # Change feed (/api/inventory/changes) settings
+    CHANGES_FEED_LIMIT = int(os.getenv('CHANGES_FEED_LIMIT', '500'))
+    # updated_at comes from each worker's clock and is stamped before commit,
+    # so next_since stays this many seconds behind now and the overlap is resent
+    CHANGES_FEED_LAG = float(os.getenv('CHANGES_FEED_LAG', '5'))
+    TOMBSTONE_RETENTION_DAYS = int(os.getenv('TOMBSTONE_RETENTION_DAYS', '7'))
+    
+    # Server-Sent Events (/api/inventory/stream); fan-out uses LISTEN/NOTIFY on PostgreSQL
+    INVENTORY_EVENTS_CHANNEL = os.getenv('INVENTORY_EVENTS_CHANNEL', 'inventory_events')
+    SSE_HEARTBEAT_INTERVAL = int(os.getenv('SSE_HEARTBEAT_INTERVAL', '15'))
+    SSE_CLIENT_BUFFER = int(os.getenv('SSE_CLIENT_BUFFER', '100'))
+    SSE_MAX_CLIENTS = int(os.getenv('SSE_MAX_CLIENTS', '100'))
+    
+    # Idempotency-Key support: how long responses are replayable, how long an
+    # unfinished first request blocks replays, and the in-memory front cache
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', '86400'))
+    IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60'))
+    IDEMPOTENCY_CACHE_SIZE = int(os.getenv('IDEMPOTENCY_CACHE_SIZE', '10000'))
+    
+    # Largest batch accepted by POST /api/inventory/adjust
+    ADJUST_MAX_ITEMS = int(os.getenv('ADJUST_MAX_ITEMS', '500'))
+    
+    # Bulk import settings
+    BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', '500'))
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '50000'))
+    
+    # Asynchronous validation queue (items return 202 and are validated in the background)
+    ASYNC_VALIDATION = os.getenv('ASYNC_VALIDATION', 'false').lower() == 'true'
+    VALIDATION_WORKERS = int(os.getenv('VALIDATION_WORKERS', '2'))
+    VALIDATION_BATCH_SIZE = int(os.getenv('VALIDATION_BATCH_SIZE', '100'))
+    VALIDATION_POLL_INTERVAL = float(os.getenv('VALIDATION_POLL_INTERVAL', '1.0'))
+    # Empty polls back off up to this many seconds; queueing a job wakes the workers
+    VALIDATION_MAX_POLL_INTERVAL = float(os.getenv('VALIDATION_MAX_POLL_INTERVAL', '30'))
+    VALIDATION_MAX_ATTEMPTS = int(os.getenv('VALIDATION_MAX_ATTEMPTS', '10'))
+    # A claimed job is retried by another worker if not settled within this many seconds
+    VALIDATION_LEASE_TIMEOUT = int(os.getenv('VALIDATION_LEASE_TIMEOUT', '60'))
     
     # CORS configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
     
     # Logging configuration
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
-    LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+    # Records are written by a background thread as JSON (or text, using LOG_FORMAT);
+    # INFO/DEBUG lines can be sampled per route, e.g. "/api/inventory=0.1"
+    LOG_OUTPUT = os.getenv('LOG_OUTPUT', 'json').lower()
+    LOG_SAMPLE_RATES = os.getenv('LOG_SAMPLE_RATES', '')
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
     
     # Health check configuration
     HEALTH_CHECK_TIMEOUT = 5
+    # /ready serves a cached database check refreshed in the background every
+    # READINESS_CHECK_INTERVAL seconds (skipped while queries are succeeding);
+    # a result older than READINESS_MAX_AGE is refreshed by the probe itself
+    READINESS_CHECK_INTERVAL = float(os.getenv('READINESS_CHECK_INTERVAL', '10'))
+    READINESS_MAX_AGE = float(os.getenv('READINESS_MAX_AGE', '30'))
+    
+    # Response compression: bodies of at least COMPRESSION_MIN_SIZE bytes are
+    # sent as brotli (when installed) or gzip, whichever the client accepts
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '4'))
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+    
+    # Cache-Control by route ("route=directives;..."), for responses that set
+    # none themselves; other GET responses get CACHE_CONTROL_DEFAULT
+    CACHE_CONTROL_POLICIES = os.getenv(
+        'CACHE_CONTROL_POLICIES',
+        '/health=no-store;/ready=no-store;/metrics=no-store;/info=private, max-age=10'
+    )
+    CACHE_CONTROL_DEFAULT = os.getenv('CACHE_CONTROL_DEFAULT', 'no-cache')
     
     # Rate limiting (if implemented)
     RATELIMIT_STORAGE_URL = os.getenv('REDIS_URL', 'memory://')
@@ -68,6 +178,10 @@ class Config:
         'X-Service-Name': 'inventory-backend',
         'X-Service-Version': '1.0.0'
     }
+    
+    @classmethod
+    def validate(cls):
+        """Raise ValueError if this configuration cannot be used"""
 
 
 class DevelopmentConfig(Config):
@@ -75,9 +189,10 @@ class DevelopmentConfig(Config):
     DEBUG = True
     TESTING = False
     LOG_LEVEL = 'DEBUG'
+    LOG_OUTPUT = os.getenv('LOG_OUTPUT', 'text').lower()
     
     # Use SQLite for local development if no PostgreSQL
-    if not Config.DB_HOST or Config.DB_HOST == 'localhost':
+    if not os.getenv('DATABASE_URL') and (not Config.DB_HOST or Config.DB_HOST == 'localhost'):
         SQLALCHEMY_DATABASE_URI = 'sqlite:///inventory_dev.db'
 
 
@@ -86,8 +201,9 @@ class TestingConfig(Config):
     TESTING = True
     DEBUG = True
     
-    # Use in-memory SQLite for testing
+    # Use in-memory SQLite for testing (a single shared connection, so no pool sizing)
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}
     
     # Disable CSRF for testing
     WTF_CSRF_ENABLED = False
@@ -101,22 +217,25 @@ class ProductionConfig(Config):
     DEBUG = False
     TESTING = False
     
-    # Require secret key in production
+    # Require secret key in production (checked when the app is created)
     SECRET_KEY = os.getenv('SECRET_KEY')
-    if not SECRET_KEY:
-        raise ValueError("SECRET_KEY environment variable must be set in production")
     
     # Production logging
     LOG_LEVEL = 'WARNING'
     
-    # Production database settings
+    # Production database settings (per worker process)
     SQLALCHEMY_ENGINE_OPTIONS = {
-        'pool_pre_ping': True,
+        'pool_pre_ping': False,
         'pool_recycle': 300,
         'pool_timeout': 20,
-        'max_overflow': 20,
-        'pool_size': 20
+        'max_overflow': Config.DB_MAX_OVERFLOW,
+        'pool_size': Config.DB_POOL_SIZE
     }
+    
+    @classmethod
+    def validate(cls):
+        if not cls.SECRET_KEY:
+            raise ValueError("SECRET_KEY environment variable must be set in production")
 
 
 class OpenShiftConfig(Config):
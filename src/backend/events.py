@@ -0,0 +1,247 @@
+"""
+OpenShift Service Mesh Inventory Demo - Inventory Events
+Change notifications for the /api/inventory/stream Server-Sent Events channel
+
+Writers emit events inside their database transaction. On PostgreSQL the
+event becomes a pg_notify() on INVENTORY_EVENTS_CHANNEL, so it is only
+delivered if the transaction commits and it reaches every worker process of
+every replica through that process's LISTEN connection. Elsewhere (SQLite
+in development) events are held on the session and published to the local
+broadcaster after commit.
+
+Each stream client gets a bounded buffer. A client that falls further
+behind than that is sent a resync event and disconnected rather than
+letting its backlog grow; it reconnects and reloads.
+"""
+
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+from sqlalchemy import event, text
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """One stream client's bounded event buffer"""
+
+    def __init__(self, buffer_size):
+        self.events = queue.Queue(maxsize=buffer_size)
+        self.overflowed = False
+
+    def offer(self, item):
+        try:
+            self.events.put_nowait(item)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        """Next event, or None after timeout seconds without one"""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroadcaster:
+    """In-process fan-out of inventory events to stream subscribers"""
+
+    def __init__(self, buffer_size=100, max_clients=100):
+        self.buffer_size = buffer_size
+        self.max_clients = max_clients
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.overflows = 0
+
+    def subscribe(self):
+        """Register a client, or return None when max_clients are connected"""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscription = Subscription(self.buffer_size)
+            self._subscribers.add(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+            if subscription.overflowed:
+                self.overflows += 1
+
+    def publish(self, item):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscription in subscribers:
+            subscription.offer(item)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'clients': len(self._subscribers),
+                'max_clients': self.max_clients,
+                'buffer_size': self.buffer_size,
+                'published': self.published,
+                'overflowed_clients': self.overflows
+            }
+
+
+class InventoryEvents:
+    """Emits change events transactionally and delivers them to the broadcaster"""
+
+    def __init__(self, broadcaster, channel='inventory_events', on_event=None):
+        self.broadcaster = broadcaster
+        self.channel = channel
+        # Optional callback(item) run for every delivered event (cache invalidation)
+        self.on_event = on_event
+        self.listener = None
+
+    def emit(self, session, event_type, **fields):
+        """Queue an event on session; it is delivered only if the transaction commits"""
+        item = {'type': event_type, **fields}
+        if session.get_bind().dialect.name == 'postgresql':
+            session.execute(
+                text('SELECT pg_notify(:channel, :payload)'),
+                {'channel': self.channel, 'payload': json.dumps(item, default=str)}
+            )
+        else:
+            _install_session_hooks(session)
+            session.info.setdefault('inventory_events', []).append((self, item))
+
+    def deliver(self, item):
+        if self.on_event is not None:
+            try:
+                self.on_event(item)
+            except Exception as e:
+                logger.warning(f"Inventory event hook failed: {e}")
+        self.broadcaster.publish(item)
+
+    def start_listener(self, engine):
+        """Follow the NOTIFY channel in a background thread (PostgreSQL only)"""
+        if engine.dialect.name != 'postgresql' or self.listener is not None:
+            return
+        self.listener = NotifyListener(engine, self.channel, self._on_notify)
+        self.listener.start()
+
+    def _on_notify(self, payload):
+        try:
+            item = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed inventory event: {payload[:100]}")
+            return
+        self.deliver(item)
+
+    def stats(self):
+        return {
+            'channel': self.channel,
+            'transport': 'listen_notify' if self.listener is not None else 'in_process',
+            **self.broadcaster.stats()
+        }
+
+
+_hooked_sessions = set()
+
+
+def _install_session_hooks(session):
+    """Deliver events held on a session (non-PostgreSQL databases) after it commits"""
+    if id(session) in _hooked_sessions:
+        return
+    _hooked_sessions.add(id(session))
+
+    def after_commit(committed_session):
+        for emitter, item in committed_session.info.pop('inventory_events', []):
+            emitter.deliver(item)
+
+    def after_rollback(rolled_back_session):
+        rolled_back_session.info.pop('inventory_events', None)
+
+    event.listen(session, 'after_commit', after_commit)
+    event.listen(session, 'after_rollback', after_rollback)
+
+
+class NotifyListener:
+    """Dedicated LISTEN connection that hands NOTIFY payloads to a callback"""
+
+    def __init__(self, engine, channel, callback, poll_timeout=5):
+        self.engine = engine
+        self.channel = channel
+        self.callback = callback
+        self.poll_timeout = poll_timeout
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='inventory-events-listener', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        backoff = 1
+        while not self._stop.is_set():
+            try:
+                self._listen()
+                backoff = 1
+            except Exception as e:
+                logger.error(f"Inventory event listener failed, reconnecting in {backoff}s: {e}")
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _listen(self):
+        # A connection of its own, taken out of the pool for as long as it listens
+        pooled = self.engine.raw_connection()
+        pooled.detach()
+        connection = pooled.driver_connection
+        try:
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            logger.info(f"Listening for inventory events on channel {self.channel}")
+
+            while not self._stop.is_set():
+                if select.select([connection], [], [], self.poll_timeout) == ([], [], []):
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    notification = connection.notifies.pop(0)
+                    self.callback(notification.payload)
+        finally:
+            pooled.close()
+
+
+def format_sse(item=None, event_type=None, comment=None, retry=None):
+    """Encode one Server-Sent Events frame"""
+    lines = []
+    if comment is not None:
+        lines.append(f': {comment}')
+    if retry is not None:
+        lines.append(f'retry: {retry}')
+    if event_type is not None:
+        lines.append(f'event: {event_type}')
+    if item is not None:
+        lines.append(f'data: {json.dumps(item, default=str, separators=(",", ":"))}')
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+def stream_events(broadcaster, subscription, heartbeat_interval):
+    """Generator for a stream response: events as they arrive, heartbeats when idle"""
+    try:
+        yield format_sse({'type': 'ready', 'at': time.time()}, event_type='ready', retry=5000)
+        while True:
+            item = subscription.get(timeout=heartbeat_interval)
+            if subscription.overflowed:
+                yield format_sse({'type': 'resync'}, event_type='resync')
+                return
+            if item is None:
+                # Keeps proxies from timing out idle streams and detects gone clients
+                yield format_sse(comment='heartbeat')
+                continue
+            yield format_sse(item, event_type=item.get('type'))
+    finally:
+        broadcaster.unsubscribe(subscription)
@@ -0,0 +1,153 @@
+"""
+OpenShift Service Mesh Inventory Demo - Idempotency Keys
+Replay-safe POST handling for requests that carry an Idempotency-Key header
+
+The first request with a key claims it by inserting a row (the key is the
+primary key, so exactly one replica wins), runs, and stores its response.
+Replays within the TTL get the stored response back without validating or
+writing again; a replay that arrives while the first request is still
+running gets 409 and retries. Completed responses are also kept in a small
+in-process LRU in front of the table.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from caching import MISSING, LRUCache
+
+logger = logging.getLogger(__name__)
+
+# Claim outcomes
+CLAIMED = 'claimed'
+REPLAY = 'replay'
+IN_PROGRESS = 'in_progress'
+MISMATCH = 'mismatch'
+
+
+def request_fingerprint(method, path, payload):
+    """Hash of what was asked for, so a key reused for another request is caught"""
+    body = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(f'{method} {path}\n{body}'.encode()).hexdigest()
+
+
+class StoredResponse:
+    """The parts of a response that are replayed"""
+
+    def __init__(self, status_code, body, content_type, location=None):
+        self.status_code = status_code
+        self.body = body
+        self.content_type = content_type
+        self.location = location
+
+
+class IdempotencyStore:
+    """Claims, completes and replays idempotency keys in the given table"""
+
+    def __init__(self, session, model, ttl=86400, lock_timeout=60, cache_size=10000, prune_every=100):
+        self.session = session
+        self.model = model
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.cache = LRUCache(max_size=cache_size, default_ttl=ttl) if cache_size else None
+        self.prune_every = prune_every
+        self._claims = 0
+        self.replays = 0
+
+    def claim(self, key, fingerprint, retry=True):
+        """Return (outcome, StoredResponse or None) for a new request carrying key"""
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not MISSING:
+                stored_fingerprint, response = cached
+                if stored_fingerprint != fingerprint:
+                    return MISMATCH, None
+                self.replays += 1
+                return REPLAY, response
+
+        now = datetime.utcnow()
+        self._maybe_prune(now)
+        try:
+            self.session.execute(insert(self.model).values(
+                key=key, fingerprint=fingerprint, created_at=now,
+                expires_at=now + timedelta(seconds=self.ttl)
+            ))
+            self.session.commit()
+            return CLAIMED, None
+        except IntegrityError:
+            self.session.rollback()
+
+        row = self.session.get(self.model, key)
+        if row is None:
+            # Released or pruned between our insert and this read - try once more
+            return self.claim(key, fingerprint, retry=False) if retry else (IN_PROGRESS, None)
+        expired = row.expires_at <= now
+        if not expired and row.fingerprint != fingerprint:
+            return MISMATCH, None
+
+        abandoned = row.status_code is None and row.created_at <= now - timedelta(seconds=self.lock_timeout)
+        if expired or abandoned:
+            # Expired, or left behind by a request that never finished: take it over
+            taken = self.session.query(self.model).filter(
+                self.model.key == key, self.model.created_at == row.created_at
+            ).update({
+                'fingerprint': fingerprint,
+                'created_at': now,
+                'expires_at': now + timedelta(seconds=self.ttl),
+                'status_code': None,
+                'response_body': None
+            }, synchronize_session=False)
+            self.session.commit()
+            return (CLAIMED, None) if taken else (IN_PROGRESS, None)
+
+        if row.status_code is None:
+            return IN_PROGRESS, None
+
+        response = StoredResponse(row.status_code, row.response_body, row.content_type, row.location)
+        self.session.rollback()
+        if self.cache is not None:
+            self.cache.set(key, (fingerprint, response))
+        self.replays += 1
+        return REPLAY, response
+
+    def complete(self, key, fingerprint, response):
+        """Store the response of a claimed request for replay"""
+        self.session.query(self.model).filter(self.model.key == key).update({
+            'status_code': response.status_code,
+            'response_body': response.body,
+            'content_type': response.content_type,
+            'location': response.location
+        }, synchronize_session=False)
+        self.session.commit()
+        if self.cache is not None:
+            self.cache.set(key, (fingerprint, response))
+
+    def release(self, key):
+        """Give up a claim (the request failed and may be retried)"""
+        self.session.rollback()
+        self.session.query(self.model).filter(
+            self.model.key == key, self.model.status_code.is_(None)
+        ).delete(synchronize_session=False)
+        self.session.commit()
+
+    def _maybe_prune(self, now):
+        self._claims += 1
+        if self._claims % self.prune_every:
+            return
+        removed = self.session.query(self.model).filter(
+            self.model.expires_at < now
+        ).delete(synchronize_session=False)
+        self.session.commit()
+        if removed:
+            logger.info(f"Pruned {removed} expired idempotency keys")
+
+    def stats(self):
+        return {
+            'ttl_seconds': self.ttl,
+            'replays': self.replays,
+            'cache': self.cache.stats() if self.cache is not None else {'enabled': False}
+        }
@@ -0,0 +1,131 @@
+"""
+OpenShift Service Mesh Inventory Demo - Backend Instrumentation
+Prometheus metrics for routes, database queries, legacy calls and caches
+"""
+
+import time
+
+from sqlalchemy import event
+
+from metrics import Registry, instrument_app
+
+PREFIX = 'inventory_backend'
+
+# Statement verbs reported as-is; anything else is grouped as "other"
+QUERY_OPERATIONS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'BEGIN', 'COMMIT', 'ROLLBACK'}
+
+
+def install_metrics(app, engine):
+    """Create the backend registry, hook it into app and engine, and serve /metrics"""
+    registry = Registry()
+    instrument_app(app, registry, PREFIX)
+
+    query_duration = registry.histogram(
+        f'{PREFIX}_db_query_duration_seconds',
+        'Database statement execution time',
+        ('operation',)
+    )
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('_query_started', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['_query_started'].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+        if operation not in QUERY_OPERATIONS:
+            operation = 'OTHER'
+        query_duration.labels(operation).observe(time.perf_counter() - started)
+
+    def handle_error(exception_context):
+        # Keep the start-time stack balanced when a statement fails
+        started = exception_context.connection.info.get('_query_started') if exception_context.connection else None
+        if started:
+            started.pop()
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    event.listen(engine, 'handle_error', handle_error)
+
+    legacy_duration = registry.histogram(
+        f'{PREFIX}_legacy_request_duration_seconds',
+        'Legacy validator call latency by endpoint and outcome',
+        ('endpoint', 'outcome')
+    )
+
+    def observe_legacy_call(endpoint, outcome, seconds):
+        legacy_duration.labels(endpoint, outcome).observe(seconds)
+
+    app.extensions['legacy_client'].observer = observe_legacy_call
+
+    registry.register_collector(lambda: _validation_cache_samples(app))
+    registry.register_collector(lambda: _item_cache_samples(app))
+    registry.register_collector(lambda: _pool_samples(app))
+    registry.register_collector(lambda: _coalescing_samples(app))
+    return registry
+
+
+def _validation_cache_samples(app):
+    cache = app.extensions.get('validation_cache')
+    if cache is None:
+        return []
+    stats = cache.stats()
+    backend = {'backend': stats['backend']}
+    return [
+        (f'{PREFIX}_validation_cache_hits_total', 'counter',
+         'Validation results served from the cache', [(backend, stats['hits'])]),
+        (f'{PREFIX}_validation_cache_misses_total', 'counter',
+         'Validation lookups that missed the cache', [(backend, stats['misses'])]),
+        (f'{PREFIX}_validation_cache_entries', 'gauge',
+         'Validation results currently cached', [(backend, stats['size'])]),
+    ]
+
+
+def _item_cache_samples(app):
+    cache = app.extensions.get('item_cache')
+    if cache is None:
+        return []
+    stats = cache.stats()
+    return [
+        (f'{PREFIX}_item_cache_hits_total', 'counter',
+         'Item reads served from the response cache', [({}, stats['hits'])]),
+        (f'{PREFIX}_item_cache_misses_total', 'counter',
+         'Item reads that missed the response cache', [({}, stats['misses'])]),
+        (f'{PREFIX}_item_cache_evictions_total', 'counter',
+         'Item responses evicted to stay within the size limit', [({}, stats['evictions'])]),
+        (f'{PREFIX}_item_cache_entries', 'gauge',
+         'Item responses currently cached', [({}, stats['size'])]),
+    ]
+
+
+def _coalescing_samples(app):
+    coalescer = app.extensions.get('legacy_coalescer')
+    if coalescer is None:
+        return []
+    stats = coalescer.stats()
+    mode = {'mode': stats['mode']}
+    return [
+        (f'{PREFIX}_legacy_coalesced_calls_total', 'counter',
+         'Legacy calls made on behalf of coalesced validations', [(mode, stats['legacy_calls'])]),
+        (f'{PREFIX}_legacy_coalesced_shared_total', 'counter',
+         'Validations answered by another request\'s in-flight call', [(mode, stats['shared_results'])]),
+    ]
+
+
+def _pool_samples(app):
+    stats = app.extensions['pool_telemetry'].snapshot()
+    samples = [
+        (f'{PREFIX}_db_pool_checkouts_total', 'counter',
+         'Connections checked out of the pool', [({}, stats['checkouts'])]),
+        (f'{PREFIX}_db_pool_wait_seconds_total', 'counter',
+         'Time spent waiting for a pooled connection', [({}, stats['wait']['total_ms'] / 1000)]),
+        (f'{PREFIX}_db_pool_pre_ping_seconds_total', 'counter',
+         'Time spent pinging idle connections on checkout', [({}, stats['pre_ping']['total_ms'] / 1000)]),
+    ]
+    if 'checked_out' in stats:
+        samples.extend([
+            (f'{PREFIX}_db_pool_checked_out', 'gauge',
+             'Connections currently checked out', [({}, stats['checked_out'])]),
+            (f'{PREFIX}_db_pool_overflow', 'gauge',
+             'Connections open beyond pool_size (negative while filling)', [({}, stats['overflow'])]),
+        ])
+    return samples
@@ -0,0 +1,238 @@
+"""
+OpenShift Service Mesh Inventory Demo - Legacy Validation Client
+Pooled HTTP client and circuit breaker for calls to the legacy VM service
+"""
+
+import logging
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from request_logging import current_request_id
+
+logger = logging.getLogger(__name__)
+
+
+# Client errors that say nothing about the code: the same request may succeed later
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+class ValidationServiceError(Exception):
+    """The legacy service could not give a definitive answer (timeout, 5xx, ...)"""
+
+
+class CircuitOpenError(ValidationServiceError):
+    """The circuit breaker is open and the legacy service is not being called"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker.
+    closed: calls flow; consecutive failures are counted
+    open: calls fail fast until reset_timeout has elapsed
+    half_open: a single trial call decides between closed and open
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow_request(self):
+        """Return True if a call may be made now"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+
+            # Half-open: let exactly one trial call through
+            if self._trial_in_flight:
+                self.rejected += 1
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Legacy service circuit closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(f"Legacy service circuit opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        """Return breaker state for readiness reporting"""
+        state = self.state
+        with self._lock:
+            retry_in = None
+            if state == self.OPEN:
+                retry_in = round(self.reset_timeout - (time.monotonic() - self._opened_at), 1)
+            return {
+                'state': state,
+                'consecutive_failures': self._failures,
+                'failure_threshold': self.failure_threshold,
+                'rejected_calls': self.rejected,
+                'retry_in_seconds': retry_in
+            }
+
+
+class LegacyClient:
+    """Keep-alive HTTP client for the legacy validator, guarded by a circuit breaker"""
+
+    def __init__(self, base_url, timeout=10, connect_timeout=2, pool_size=10,
+                 breaker=None, headers=None, observer=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, timeout)
+        self.breaker = breaker or CircuitBreaker()
+        # Optional callback(endpoint, outcome, seconds) for metrics
+        self.observer = observer
+
+        # One pooled session per process; connections to the sidecar are reused
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(headers or {})
+
+    def _post(self, path, payload):
+        """POST to the legacy service, returning the response or raising ValidationServiceError"""
+        if not self.breaker.allow_request():
+            self._observe(path, 'circuit_open', 0.0)
+            raise CircuitOpenError("Validation service unavailable - circuit open")
+
+        started = time.perf_counter()
+        try:
+            # Forward the mesh request id so both services' logs and traces line up
+            request_id = current_request_id()
+            response = self.session.post(
+                f'{self.base_url}{path}', json=payload, timeout=self.timeout,
+                headers={'X-Request-ID': request_id} if request_id else None
+            )
+        except requests.exceptions.Timeout:
+            self.breaker.record_failure()
+            self._observe(path, 'timeout', time.perf_counter() - started)
+            logger.error("Legacy validation service timeout")
+            raise ValidationServiceError("Validation service timeout - please try again")
+        except requests.exceptions.ConnectionError:
+            self.breaker.record_failure()
+            self._observe(path, 'connection_error', time.perf_counter() - started)
+            logger.error(f"Cannot connect to legacy service at {self.base_url}")
+            raise ValidationServiceError("Cannot connect to validation service")
+        except requests.exceptions.RequestException as e:
+            self.breaker.record_failure()
+            self._observe(path, 'error', time.perf_counter() - started)
+            logger.error(f"Legacy validation request failed: {e}")
+            raise ValidationServiceError(f"Validation service error: {str(e)}")
+
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        outcome = 'success' if response.status_code == 200 else f'http_{response.status_code}'
+        self._observe(path, outcome, time.perf_counter() - started)
+        return response
+
+    def _observe(self, path, outcome, seconds):
+        if self.observer is not None:
+            self.observer(path, outcome, seconds)
+
+    @staticmethod
+    def _check_status(response):
+        """
+        Raise ValidationServiceError unless response is a definitive answer.
+        A 4xx means the validator understood us and refused the request, so
+        it is a rejection (and not a breaker failure); 5xx, 408 and 429 are not.
+        """
+        status = response.status_code
+        if status == 200:
+            return
+        logger.error(f"Legacy service returned status {status}: {response.text}")
+        if status >= 500 or status < 400 or status in RETRYABLE_CLIENT_ERRORS:
+            raise ValidationServiceError(f"Validation service error: HTTP {status}")
+
+    @staticmethod
+    def _rejection(response):
+        """(False, message) for a 4xx answer, with the validator's message if it sent one"""
+        try:
+            message = response.json().get('message')
+        except (ValueError, AttributeError):
+            message = None
+        return False, message or f"Validation service error: HTTP {response.status_code}"
+
+    def validate(self, code):
+        """Validate one code, returning (is_valid, message)"""
+        logger.info(f"Validating item code {code} with legacy service at {self.base_url}")
+        response = self._post('/validate', {'code': code})
+        self._check_status(response)
+        if response.status_code != 200:
+            return self._rejection(response)
+
+        try:
+            result = response.json()
+        except ValueError:
+            raise ValidationServiceError("Unexpected validation error")
+        logger.info(f"Legacy validation result: {result}")
+        return result.get('valid', False), result.get('message', 'Unknown validation result')
+
+    def validate_batch(self, codes):
+        """Validate many codes with one call, returning (is_valid, message) tuples in input order"""
+        logger.info(f"Validating {len(codes)} item codes with legacy service at {self.base_url}")
+        response = self._post('/validate/batch', {'codes': codes})
+
+        if response.status_code in (404, 413):
+            # Older validator without the batch endpoint, or a smaller batch
+            # limit than ours - validate one by one
+            logger.warning(f"Legacy service refused the batch (HTTP {response.status_code}), "
+                           f"falling back to single validation")
+            return [self.validate(code) for code in codes]
+
+        self._check_status(response)
+        if response.status_code != 200:
+            # The validator refused the whole request: the same answer for every code
+            return [self._rejection(response)] * len(codes)
+
+        try:
+            results = response.json().get('results', [])
+        except ValueError:
+            raise ValidationServiceError("Unexpected validation error")
+        if len(results) != len(codes):
+            logger.error(f"Legacy service returned {len(results)} results for {len(codes)} codes")
+            raise ValidationServiceError("Validation service returned an incomplete batch")
+
+        return [
+            (result.get('valid', False), result.get('message', 'Unknown validation result'))
+            for result in results
+        ]
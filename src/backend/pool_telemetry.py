@@ -0,0 +1,159 @@
+"""
+OpenShift Service Mesh Inventory Demo - Database Pool Telemetry
+Connection pool metrics and an interval-based pre-ping for SQLAlchemy engines
+
+pool_pre_ping issues a round trip on every checkout. Here a connection is
+only pinged when it has sat idle in the pool for longer than
+DB_PRE_PING_INTERVAL seconds (0 pings on every checkout), and the cost of
+each ping is recorded alongside pool occupancy and checkout wait times.
+The time of the last successful and failed statement is kept as well, so
+readiness can trust live traffic instead of issuing its own query.
+"""
+
+import logging
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTelemetry:
+    """Counters for one engine's connection pool"""
+
+    def __init__(self, pre_ping_interval=30):
+        self.pre_ping_interval = pre_ping_interval
+        self.engine = None
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.ping_count = 0
+        self.ping_total = 0.0
+        self.ping_failures = 0
+        # time.monotonic() of the last statement that completed / raised
+        self.last_success = None
+        self.last_error = None
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            if seconds > self.wait_max:
+                self.wait_max = seconds
+
+    def install(self, engine):
+        """Attach pool event listeners to engine"""
+        self.engine = engine
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+        event.listen(engine, 'after_cursor_execute', self._on_execute)
+        event.listen(engine, 'handle_error', self._on_error)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        connection_record.info['last_used'] = time.monotonic()
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        connection_record.info['last_used'] = time.monotonic()
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.last_success = time.monotonic()
+
+    def _on_error(self, exception_context):
+        # Constraint violations and bad SQL say nothing about database health
+        if exception_context.is_disconnect or isinstance(
+            exception_context.sqlalchemy_exception, exc.OperationalError
+        ):
+            self.last_error = time.monotonic()
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+
+        idle = time.monotonic() - connection_record.info.get('last_used', 0)
+        if self.pre_ping_interval is None or idle < self.pre_ping_interval:
+            return
+
+        started = time.perf_counter()
+        try:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute('SELECT 1')
+            finally:
+                cursor.close()
+        except Exception as e:
+            with self._lock:
+                self.ping_failures += 1
+            logger.warning(f"Pre-ping failed on idle connection, reconnecting: {e}")
+            # The pool discards this connection and retries the checkout
+            raise exc.DisconnectionError() from e
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.ping_count += 1
+                self.ping_total += elapsed
+
+    def snapshot(self):
+        """Pool occupancy and counters, with times in milliseconds"""
+        pool = self.engine.pool if self.engine is not None else None
+        with self._lock:
+            stats = {
+                'pool_class': type(pool).__name__ if pool is not None else None,
+                'connects': self.connects,
+                'checkouts': self.checkouts,
+                'invalidations': self.invalidations,
+                'wait': {
+                    'count': self.wait_count,
+                    'total_ms': round(self.wait_total * 1000, 2),
+                    'avg_ms': round(self.wait_total * 1000 / self.wait_count, 3) if self.wait_count else None,
+                    'max_ms': round(self.wait_max * 1000, 2)
+                },
+                'pre_ping': {
+                    'interval_seconds': self.pre_ping_interval,
+                    'count': self.ping_count,
+                    'failures': self.ping_failures,
+                    'total_ms': round(self.ping_total * 1000, 2),
+                    'avg_ms': round(self.ping_total * 1000 / self.ping_count, 3) if self.ping_count else None
+                }
+            }
+
+        if isinstance(pool, QueuePool):
+            stats.update({
+                'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                # Negative until the base pool has been filled
+                'overflow': pool.overflow(),
+                'max_overflow': pool._max_overflow,
+                # Share of the pool's connection limit currently checked out
+                'saturation': round(pool.checkedout() / (pool.size() + max(pool._max_overflow, 0)), 3)
+            })
+        return stats
+
+
+def instrumented_pool_class(telemetry):
+    """QueuePool subclass that records how long each checkout waited for a connection"""
+
+    class InstrumentedQueuePool(QueuePool):
+        def _do_get(self):
+            # Time spent blocked on an exhausted pool, or opening a new connection
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                telemetry.record_wait(time.perf_counter() - started)
+
+    return InstrumentedQueuePool
@@ -0,0 +1,116 @@
+"""
+OpenShift Service Mesh Inventory Demo - Readiness Monitor
+Database health for the /ready probe, checked in the background
+
+Probes used to run SELECT 1 and a commit on every request. Here a
+background thread in each worker process refreshes a cached result every
+READINESS_CHECK_INTERVAL seconds and /ready only reads it. A refresh skips
+the query when the pool has completed a statement more recently than the
+interval (and none has failed since), so a busy pod sends no probe traffic
+to PostgreSQL at all. When the cached result is older than
+READINESS_MAX_AGE (the thread is not running, or the check hangs) the probe
+refreshes inline, as before.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ReadinessMonitor:
+    """Caches the result of check_database(), refreshed by a background thread"""
+
+    def __init__(self, app, check_database, telemetry, interval=10, max_age=30):
+        self.app = app
+        self.check_database = check_database
+        self.telemetry = telemetry
+        self.interval = interval
+        self.max_age = max_age
+        self._result = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.passive = 0
+
+    def start(self):
+        """Start the checker thread (once per process)"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='readiness-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Readiness refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+    def refresh(self):
+        """Update the cached database status, querying only if traffic does not vouch for it"""
+        with self._lock:
+            now = time.monotonic()
+            last_success = self.telemetry.last_success
+            last_error = self.telemetry.last_error
+            recent_traffic = last_success is not None and now - last_success < self.interval and (
+                last_error is None or last_error < last_success
+            )
+
+            result = {'ok': True, 'source': 'traffic', 'latency_ms': None, 'error': None}
+            if not recent_traffic:
+                started = time.perf_counter()
+                try:
+                    with self.app.app_context():
+                        self.check_database()
+                    result = {'ok': True, 'source': 'query', 'error': None}
+                except Exception as e:
+                    result = {'ok': False, 'source': 'query', 'error': str(e)}
+                result['latency_ms'] = round((time.perf_counter() - started) * 1000, 2)
+                self.queries += 1
+            else:
+                self.passive += 1
+
+            previous = self._result
+            if previous is None or previous['ok'] != result['ok']:
+                if result['ok']:
+                    logger.info("Database reachable, backend ready")
+                else:
+                    logger.error(f"Readiness check failed: {result['error']}")
+
+            result.update({'checked_at': datetime.utcnow().isoformat(), 'monotonic': time.monotonic()})
+            self._result = result
+            return result
+
+    def database_status(self):
+        """The cached status, refreshed inline when missing or older than max_age"""
+        result = self._result
+        if result is None or time.monotonic() - result['monotonic'] > self.max_age:
+            result = self.refresh()
+        status = {key: value for key, value in result.items() if key != 'monotonic'}
+        status['age_seconds'] = round(time.monotonic() - result['monotonic'], 3)
+        return status
+
+    def pool_status(self):
+        """Pool occupancy for the probe body (saturation is reported, never fails readiness)"""
+        snapshot = self.telemetry.snapshot()
+        keys = ('size', 'checked_out', 'overflow', 'max_overflow', 'saturation')
+        status = {key: snapshot[key] for key in keys if key in snapshot}
+        status['wait_avg_ms'] = snapshot['wait']['avg_ms']
+        return status
+
+    def stats(self):
+        return {
+            'interval_seconds': self.interval,
+            'max_age_seconds': self.max_age,
+            'running': self._thread is not None,
+            'queries': self.queries,
+            'passive_checks': self.passive
+        }
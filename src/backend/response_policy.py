@@ -0,0 +1,150 @@
+"""
+OpenShift Service Mesh Inventory Demo - Response Policy
+Negotiated compression and per-route Cache-Control for backend responses
+
+Every response crosses the backend's and the frontend's Envoy sidecars,
+so compressing JSON here cuts the bytes both of them copy. Bodies of a
+compressible type and at least min_size bytes are encoded with the best
+encoding the client accepts: brotli when the Brotli package is installed,
+otherwise gzip. Streamed responses (SSE, exports) and responses that are
+already encoded are left alone. A strong ETag is weakened on compressed
+responses, as nginx does, since the bytes differ from the identity body;
+conditional requests compare weakly, so 304s keep working.
+
+Responses that set no Cache-Control of their own get the policy of their
+URL rule, or the default policy for GET requests.
+"""
+
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = frozenset((
+    'application/json', 'application/x-ndjson', 'text/plain', 'text/csv', 'text/html'
+))
+
+
+def available_encodings():
+    """Encodings this process can produce, most preferred first"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding, available):
+    """The available encoding with the highest q in Accept-Encoding, or None for identity"""
+    weights = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in available:
+        q = weights.get(coding, weights.get('*', 0.0))
+        # Ties go to the earlier (preferred) encoding
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def parse_cache_policies(value):
+    """Parse "route=directives;route=directives" into a dict (directives contain commas)"""
+    policies = {}
+    for part in (value or '').split(';'):
+        route, _, directives = part.strip().partition('=')
+        if route and directives:
+            policies[route.strip()] = directives.strip()
+    return policies
+
+
+class ResponseCompressor:
+    def __init__(self, level=6, brotli_quality=4, min_size=1024):
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+        self.encodings = available_encodings()
+        self.compressed = {coding: 0 for coding in self.encodings}
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def encode(self, coding, data):
+        if coding == 'br':
+            return brotli.compress(data, quality=self.brotli_quality)
+        return gzip.compress(data, compresslevel=self.level, mtime=0)
+
+    def __call__(self, response):
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        # Caches must key compressible responses on Accept-Encoding, whichever way this one goes
+        response.vary.add('Accept-Encoding')
+        if (response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.status_code < 200 or response.status_code in (204, 304)):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        coding = negotiate_encoding(request.headers.get('Accept-Encoding'), self.encodings)
+        if coding is None:
+            return response
+
+        body = self.encode(coding, data)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = coding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+        self.compressed[coding] += 1
+        self.bytes_in += len(data)
+        self.bytes_out += len(body)
+        return response
+
+    def stats(self):
+        return {
+            'encodings': list(self.encodings),
+            'gzip_level': self.level,
+            'brotli_quality': self.brotli_quality if brotli is not None else None,
+            'min_size': self.min_size,
+            'compressed_responses': dict(self.compressed),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': round(self.bytes_out / self.bytes_in, 3) if self.bytes_in else None
+        }
+
+
+def init_cache_control(app, policies, default_policy=None):
+    """Set Cache-Control from policies (by URL rule) on responses that have none"""
+
+    @app.after_request
+    def _apply_cache_policy(response):
+        if 'Cache-Control' in response.headers:
+            return response
+        rule = request.url_rule.rule if request.url_rule is not None else None
+        policy = policies.get(rule)
+        if policy is None and request.method in ('GET', 'HEAD'):
+            policy = default_policy
+        if policy:
+            response.headers['Cache-Control'] = policy
+        return response
+
+
+def init_compression(app, level=6, brotli_quality=4, min_size=1024):
+    """Compress the responses of app; returns the ResponseCompressor for its stats"""
+    compressor = ResponseCompressor(level=level, brotli_quality=brotli_quality, min_size=min_size)
+    app.after_request(compressor)
+    return compressor
@@ -0,0 +1,103 @@
+"""
+OpenShift Service Mesh Inventory Demo - Inventory Search
+Index-backed substring search on item code and name
+
+PostgreSQL: pg_trgm GIN indexes, which serve ILIKE '%term%' without a
+sequential scan, plus a varchar_pattern_ops index for code prefix lookups.
+SQLite (development/testing): an FTS5 trigram table kept in sync by triggers.
+Anything else, or a missing extension, falls back to plain ILIKE.
+"""
+
+import logging
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Trigram indexes only help once the term has at least three characters
+MIN_TRIGRAM_LENGTH = 3
+
+POSTGRES_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_items_code_trgm ON items USING gin (code gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_items_name_trgm ON items USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_items_code_prefix ON items (code varchar_pattern_ops)",
+]
+
+SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+        code, name, content='items', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_insert AFTER INSERT ON items BEGIN
+        INSERT INTO items_fts(rowid, code, name) VALUES (new.id, new.code, new.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_delete AFTER DELETE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, code, name) VALUES ('delete', old.id, old.code, old.name);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS items_fts_update AFTER UPDATE ON items BEGIN
+        INSERT INTO items_fts(items_fts, rowid, code, name) VALUES ('delete', old.id, old.code, old.name);
+        INSERT INTO items_fts(rowid, code, name) VALUES (new.id, new.code, new.name);
+    END""",
+    # Index rows that existed before the FTS table was created
+    "INSERT INTO items_fts(items_fts) VALUES ('rebuild')",
+]
+
+
+def escape_like(term):
+    """Escape LIKE wildcards so user input is matched literally"""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+class ItemSearch:
+    """Builds search filters for the items table using the best index available"""
+
+    def __init__(self, id_column, code_column, name_column):
+        self.id_column = id_column
+        self.code_column = code_column
+        self.name_column = name_column
+        self.mode = 'like'
+
+    def setup(self, engine):
+        """Create search indexes for the engine's dialect and pick the query strategy"""
+        dialect = engine.dialect.name
+        statements = {'postgresql': POSTGRES_SETUP, 'sqlite': SQLITE_SETUP}.get(dialect)
+        if statements is None:
+            logger.info(f"No search index support for {dialect}, using ILIKE")
+            return self.mode
+
+        try:
+            with engine.begin() as connection:
+                for statement in statements:
+                    connection.execute(text(statement))
+            self.mode = 'trigram' if dialect == 'postgresql' else 'fts5'
+            logger.info(f"Search indexes ready ({self.mode})")
+        except Exception as e:
+            # e.g. pg_trgm not installable, or SQLite built without FTS5
+            logger.warning(f"Could not set up search indexes, using ILIKE: {e}")
+            self.mode = 'like'
+        return self.mode
+
+    def _substring(self, term):
+        pattern = f'%{escape_like(term)}%'
+        return (
+            self.code_column.ilike(pattern, escape='\\') |
+            self.name_column.ilike(pattern, escape='\\')
+        )
+
+    def filter(self, query, term):
+        """Restrict query to items whose code or name contains term (case-insensitive)"""
+        if self.mode == 'fts5' and len(term) >= MIN_TRIGRAM_LENGTH:
+            phrase = '"' + term.replace('"', '""') + '"'
+            matches = text("SELECT rowid FROM items_fts WHERE items_fts MATCH :phrase")
+            return query.filter(self.id_column.in_(matches.bindparams(phrase=phrase)))
+
+        # On PostgreSQL the trigram GIN indexes serve these ILIKE predicates
+        return query.filter(self._substring(term))
+
+    def prefix_filter(self, query, prefix):
+        """Restrict query to items whose code starts with prefix (codes are upper case)"""
+        pattern = f'{escape_like(prefix.upper())}%'
+        return query.filter(self.code_column.like(pattern, escape='\\'))
+
+    def describe(self):
+        return {'mode': self.mode, 'min_indexed_term_length': MIN_TRIGRAM_LENGTH}
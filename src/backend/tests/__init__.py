@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The shared modules in src/common are copied next to each service in its image
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'common'))
@@ -0,0 +1,64 @@
+"""
+OpenShift Service Mesh Inventory Demo - Item cache tests
+"""
+
+import threading
+import unittest
+
+from caching import ItemCache
+
+
+class ItemCacheRaceTest(unittest.TestCase):
+    def test_read_racing_a_write_does_not_cache_the_old_body(self):
+        cache = ItemCache(max_size=10, ttl=60)
+        loaded = threading.Event()
+        written = threading.Event()
+        etags = []
+
+        def reader():
+            generation = cache.generation()
+            body = b'{"id": 1, "quantity": 1}'   # row as loaded before the write
+            loaded.set()
+            written.wait(5)
+            etags.append(cache.set(1, body, generation=generation))
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        loaded.wait(5)
+        # The writer commits quantity=2 and invalidates while the reader is in flight
+        cache.invalidate(1)
+        written.set()
+        thread.join(5)
+
+        self.assertEqual(etags, [ItemCache.etag_for(b'{"id": 1, "quantity": 1}')])
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()['stale_sets'], 1)
+
+        # The next read starts after the write and is cached
+        generation = cache.generation()
+        cache.set(1, b'{"id": 1, "quantity": 2}', generation=generation)
+        self.assertEqual(cache.get(1)[0], b'{"id": 1, "quantity": 2}')
+
+    def test_invalidating_another_item_does_not_block_caching(self):
+        cache = ItemCache(max_size=10, ttl=60)
+        generation = cache.generation()
+        cache.invalidate(2)
+        cache.set(1, b'{"id": 1}', generation=generation)
+        self.assertIsNotNone(cache.get(1))
+
+    def test_forgotten_invalidations_err_on_not_caching(self):
+        cache = ItemCache(max_size=2, ttl=60)
+        generation = cache.generation()
+        cache.invalidate(1, 2, 3)   # the stamp of item 1 is dropped
+        cache.set(1, b'{"id": 1}', generation=generation)
+        self.assertIsNone(cache.get(1))
+
+    def test_set_without_generation_always_stores(self):
+        cache = ItemCache(max_size=10, ttl=60)
+        cache.invalidate(1)
+        etag = cache.set(1, b'{"id": 1}')
+        self.assertEqual(cache.get(1), (b'{"id": 1}', etag))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+OpenShift Service Mesh Inventory Demo - Legacy call coalescing tests
+"""
+
+import threading
+import time
+import unittest
+
+from coalescing import CoalescingTimeout, CoalescingValidator, MicroBatcher, SingleFlight
+
+
+def run_threads(count, target):
+    """Run target(index) in count threads; returns what each returned or raised"""
+    outcomes = [None] * count
+
+    def worker(index):
+        try:
+            outcomes[index] = target(index)
+        except Exception as e:
+            outcomes[index] = e
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, outcomes
+
+
+def join(threads, timeout=10):
+    for thread in threads:
+        thread.join(timeout)
+        assert not thread.is_alive(), "thread did not finish"
+
+
+def wait_until(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.001)
+
+
+class SingleFlightTest(unittest.TestCase):
+    def test_concurrent_callers_of_one_key_share_one_call(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        upstream = []
+
+        def fetch():
+            upstream.append(1)
+            release.wait(5)
+            return (True, 'ok')
+
+        threads, outcomes = run_threads(20, lambda index: flight.do('ABC123', fetch))
+        # Everyone but the leader is waiting on the leader's call
+        wait_until(lambda: flight.shared == 19)
+        release.set()
+        join(threads)
+
+        self.assertEqual(len(upstream), 1)
+        self.assertEqual(outcomes, [(True, 'ok')] * 20)
+        self.assertEqual((flight.calls, flight.shared), (1, 19))
+
+    def test_upstream_error_reaches_every_waiter(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        error = ConnectionError('legacy service down')
+
+        def fetch():
+            release.wait(5)
+            raise error
+
+        threads, outcomes = run_threads(10, lambda index: flight.do('ABC123', fetch))
+        wait_until(lambda: flight.shared == 9)
+        release.set()
+        join(threads)
+
+        self.assertTrue(all(outcome is error for outcome in outcomes))
+        # The failed call is not kept: the next caller tries again
+        self.assertEqual(flight.do('ABC123', lambda: (True, 'ok')), (True, 'ok'))
+
+    def test_slow_leader_does_not_block_followers_past_their_timeout(self):
+        flight = SingleFlight(timeout=0.1)
+        release = threading.Event()
+
+        def slow_fetch():
+            release.wait(5)
+            return (True, 'ok')
+
+        leader, leader_outcome = run_threads(1, lambda index: flight.do('ABC123', slow_fetch))
+        wait_until(lambda: flight.calls == 1)
+
+        started = time.monotonic()
+        followers, outcomes = run_threads(5, lambda index: flight.do('ABC123', slow_fetch))
+        join(followers)
+        elapsed = time.monotonic() - started
+
+        self.assertTrue(all(isinstance(outcome, CoalescingTimeout) for outcome in outcomes))
+        self.assertLess(elapsed, 2)
+        self.assertEqual(flight.timeouts, 5)
+
+        # The leader is not bound by the followers' timeout
+        release.set()
+        join(leader)
+        self.assertEqual(leader_outcome, [(True, 'ok')])
+
+
+class MicroBatcherTest(unittest.TestCase):
+    def test_batch_is_sent_when_it_reaches_max_batch(self):
+        batches = []
+
+        def call_batch(keys):
+            batches.append(sorted(keys))
+            return [(True, key) for key in keys]
+
+        # The window is far longer than the test may take: only the size limit sends it
+        batcher = MicroBatcher(call_batch, window=30, max_batch=3)
+        started = time.monotonic()
+        threads, outcomes = run_threads(3, lambda index: batcher.submit(f'CODE{index}'))
+        join(threads)
+
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual(batches, [['CODE0', 'CODE1', 'CODE2']])
+        self.assertEqual(outcomes, [(True, f'CODE{index}') for index in range(3)])
+
+    def test_batch_is_sent_when_the_window_closes(self):
+        batches = []
+
+        def call_batch(keys):
+            batches.append(sorted(keys))
+            return [(True, key) for key in keys]
+
+        batcher = MicroBatcher(call_batch, window=0.2, max_batch=100)
+        started = time.monotonic()
+        threads, outcomes = run_threads(4, lambda index: batcher.submit(f'CODE{index % 2}'))
+        join(threads)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(batches, [['CODE0', 'CODE1']])
+        self.assertEqual(outcomes, [(True, f'CODE{index % 2}') for index in range(4)])
+        self.assertEqual(batcher.shared, 2)
+
+    def test_batch_error_reaches_every_submitter(self):
+        error = ConnectionError('legacy service down')
+
+        def call_batch(keys):
+            raise error
+
+        batcher = MicroBatcher(call_batch, window=0.05, max_batch=100)
+        threads, outcomes = run_threads(6, lambda index: batcher.submit(f'CODE{index}'))
+        join(threads)
+
+        self.assertTrue(all(outcome is error for outcome in outcomes))
+
+    def test_slow_batch_does_not_block_submitters_past_their_timeout(self):
+        release = threading.Event()
+
+        def slow_batch(keys):
+            release.wait(5)
+            return [(True, key) for key in keys]
+
+        validator = CoalescingValidator(None, slow_batch, window=0.01, max_batch=100, timeout=0.2)
+        leader, leader_outcome = run_threads(1, lambda index: validator.validate('abc123'))
+        wait_until(lambda: validator.batcher.batches == 1)
+
+        started = time.monotonic()
+        followers, outcomes = run_threads(3, lambda index: validator.validate('ABC123'))
+        join(followers)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(all(isinstance(outcome, CoalescingTimeout) for outcome in outcomes))
+        self.assertEqual(validator.stats()['wait_timeouts'], 3)
+        release.set()
+        join(leader)
+        self.assertEqual(leader_outcome, [(True, 'ABC123')])
+
+
+if __name__ == '__main__':
+    unittest.main()
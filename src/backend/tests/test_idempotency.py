@@ -0,0 +1,112 @@
+"""
+OpenShift Service Mesh Inventory Demo - Idempotency-Key concurrency tests
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import app as backend
+from config import TestingConfig
+
+
+class ConcurrentPostTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+        class Config(TestingConfig):
+            # A file database, so concurrent requests get their own connections
+            SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(self.tmpdir, 'inventory.db')
+            SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 10}}
+            ITEM_CACHE_ENABLED = False
+
+        self.app = backend.create_app(Config)
+        backend.create_tables(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        with self.app.app_context():
+            backend.db.engine.dispose()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def post(self, results, key, code='ABC123'):
+        response = self.app.test_client().post(
+            '/api/inventory', json={'code': code, 'name': 'Widget', 'quantity': 1},
+            headers={'Idempotency-Key': key}
+        )
+        results.append(response)
+
+    def item_count(self):
+        with self.app.app_context():
+            return backend.Item.query.count()
+
+    def key_rows(self):
+        with self.app.app_context():
+            return {row.key: row.status_code for row in backend.IdempotencyKey.query}
+
+    def test_same_key_in_flight_inserts_once(self):
+        validating = threading.Event()
+        proceed = threading.Event()
+        validate = backend.validate_item_code
+
+        def slow_validate(code):
+            validating.set()
+            proceed.wait(10)
+            return validate(code)
+
+        first, second = [], []
+        with mock.patch.object(backend, 'validate_item_code', slow_validate):
+            leader = threading.Thread(target=self.post, args=(first, 'key-1'))
+            leader.start()
+            self.assertTrue(validating.wait(10))
+            # The first request holds the key while this one arrives
+            follower = threading.Thread(target=self.post, args=(second, 'key-1'))
+            follower.start()
+            follower.join(10)
+            proceed.set()
+            leader.join(10)
+
+        self.assertEqual(first[0].status_code, 201)
+        self.assertEqual(second[0].status_code, 409)
+        self.assertEqual(second[0].headers['Retry-After'], '1')
+        self.assertEqual(self.item_count(), 1)
+
+        # A retry after the first finished replays its response
+        replay = []
+        self.post(replay, 'key-1')
+        self.assertEqual(replay[0].status_code, 201)
+        self.assertEqual(replay[0].headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(replay[0].get_json()['id'], first[0].get_json()['id'])
+        self.assertEqual(self.item_count(), 1)
+
+    def test_same_code_racing_past_the_duplicate_check_gets_409(self):
+        both_checked = threading.Barrier(2, timeout=10)
+        validate = backend.validate_item_code
+
+        def validate_together(code):
+            # Both requests have passed the duplicate-code check by now
+            both_checked.wait()
+            return validate(code)
+
+        results = []
+        with mock.patch.object(backend, 'validate_item_code', validate_together):
+            threads = [threading.Thread(target=self.post, args=(results, key)) for key in ('key-a', 'key-b')]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(20)
+
+        self.assertEqual(sorted(response.status_code for response in results), [201, 409])
+        loser = next(response for response in results if response.status_code == 409)
+        self.assertEqual(loser.get_json()['existing_item']['code'], 'ABC123')
+        self.assertEqual(self.item_count(), 1)
+
+        # The conflict was not stored: only the winner's key remains
+        self.assertEqual(list(self.key_rows().values()), [201])
+
+
+if __name__ == '__main__':
+    unittest.main()
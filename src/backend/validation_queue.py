@@ -0,0 +1,136 @@
+"""
+OpenShift Service Mesh Inventory Demo - Validation Queue Workers
+Background threads that drain the database-backed validation queue
+
+Items created in asynchronous mode are stored as pending_validation with a
+row in the validation_jobs table. Each backend worker process runs a small
+pool of these threads; every pass claims a batch of due jobs (SKIP LOCKED
+on PostgreSQL, so replicas never double-claim), validates the codes with a
+single batch call and marks the items active or rejected. The queue lives
+in the database, so it survives restarts and needs no external broker.
+
+Idle polling backs off from poll_interval to max_poll_interval; queueing
+a job in this process wakes the workers at once. When asynchronous
+validation is not the default, the workers only run while there are jobs
+(queued by a request that asked for async, or left from earlier runs) and
+exit once the queue is drained.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ValidationWorkerPool:
+    """Runs process_batch() in background threads until stopped"""
+
+    def __init__(self, app, process_batch, workers=2, poll_interval=1.0, max_poll_interval=30.0,
+                 has_pending=None):
+        self.app = app
+        self.process_batch = process_batch
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max(poll_interval, max_poll_interval)
+        # Called in an app context; whether any job (due or not) is still queued
+        self.has_pending = has_pending
+        self.drain = False
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.batches = 0
+        self.errors = 0
+        self.last_batch_seconds = None
+
+    def start(self, drain=False):
+        """
+        Start the worker threads of this process unless they are running.
+        With drain=True they exit once no jobs are left.
+        """
+        with self._lock:
+            if self._threads:
+                # Running; a non-draining start keeps them running
+                self.drain = self.drain and drain
+                return
+            self.drain = drain
+            self._stop.clear()
+            for index in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f'validation-worker-{index}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info("Started %d validation queue workers%s", self.workers, ' (until drained)' if drain else '')
+
+    def wake(self, drain=False):
+        """A job was queued: poll now, starting the workers if they are not running"""
+        # Set before start() so a worker deciding to exit sees it
+        self._wake.set()
+        self.start(drain=drain)
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        self._wake.set()
+        for thread in list(self._threads):
+            thread.join(timeout)
+        self._threads = []
+
+    def _drained(self):
+        """Exit check for draining workers; True (and deregistered) when nothing is left"""
+        try:
+            with self.app.app_context():
+                if self.has_pending is None or self.has_pending():
+                    return False
+        except Exception as e:
+            logger.error(f"Validation queue check failed: {e}")
+            return False
+        with self._lock:
+            if self._wake.is_set() or not self.drain:
+                return False
+            self._threads.remove(threading.current_thread())
+        return True
+
+    def _run(self):
+        delay = self.poll_interval
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            try:
+                with self.app.app_context():
+                    count = self.process_batch()
+            except Exception as e:
+                logger.error(f"Validation queue batch failed: {e}")
+                with self._lock:
+                    self.errors += 1
+                count = 0
+
+            if count:
+                with self._lock:
+                    self.processed += count
+                    self.batches += 1
+                    self.last_batch_seconds = round(time.perf_counter() - started, 3)
+                delay = self.poll_interval
+                continue
+
+            if self.drain and self._drained():
+                logger.info("Validation queue drained, worker exiting")
+                return
+            # Nothing due (or failing) - wait, backing off while the queue stays idle
+            if self._wake.wait(delay):
+                self._wake.clear()
+                delay = self.poll_interval
+            else:
+                delay = min(delay * 2, self.max_poll_interval)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': len(self._threads),
+                'mode': 'stopped' if not self._threads else 'until_drained' if self.drain else 'always',
+                'processed': self.processed,
+                'batches': self.batches,
+                'errors': self.errors,
+                'last_batch_seconds': self.last_batch_seconds
+            }
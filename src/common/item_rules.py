@@ -0,0 +1,176 @@
+"""
+OpenShift Service Mesh Inventory Demo - Item Code Rules
+Compiled, table-driven item code rules shared by the legacy validator and the backend mock
+
+The rule set is plain data (LEGACY_RULES, or a JSON file with the same
+keys). RuleEngine compiles it once into a precompiled pattern, per-length
+prefix/suffix lookup tables and a reserved-code map, so checking a code is
+a handful of dict lookups instead of a scan over every rule. When a rules
+file is configured its mtime is polled and a changed file is recompiled
+and swapped in without a restart; a file that fails to load leaves the
+previous rules in place.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# "Legacy" business rules database (simulated)
+LEGACY_RULES = {
+    'prohibited_prefixes': ['XX', 'ZZ', 'TEST', 'TEMP', 'DEMO', 'SYS'],
+    'prohibited_suffixes': ['000', '999', 'DEL', 'BAD'],
+    'required_pattern': r'^[A-Z][A-Z0-9]{5}$',
+    'code_length': 6,
+    'checksum_modulus': 97,
+    'checksum_minimum': 10,
+    'special_codes': {
+        'LEGACY': 'Reserved for legacy system migration',
+        'SYSTEM': 'Reserved for system use',
+        'ADMINS': 'Reserved for administrative functions'
+    }
+}
+
+
+def _affix_table(affixes):
+    """
+    Map affix length -> {affix: position in the rule list}. A code is
+    matched by slicing once per distinct length; when several affixes
+    match, the lowest position wins, exactly as a scan of the list would.
+    """
+    table = {}
+    for position, affix in enumerate(affixes):
+        table.setdefault(len(affix), {}).setdefault(affix.upper(), position)
+    return tuple(sorted(table.items()))
+
+
+class CompiledRules:
+    """One immutable, compiled rule set"""
+
+    def __init__(self, rules):
+        merged = dict(LEGACY_RULES)
+        merged.update(rules)
+        self.rules = merged
+        self.length = int(merged['code_length'])
+        self.pattern = re.compile(merged['required_pattern'])
+        self.prefixes = list(merged['prohibited_prefixes'])
+        self.suffixes = list(merged['prohibited_suffixes'])
+        self.prefix_table = _affix_table(self.prefixes)
+        self.suffix_table = _affix_table(self.suffixes)
+        self.special_codes = {code.upper(): reason for code, reason in merged['special_codes'].items()}
+        self.checksum_modulus = int(merged['checksum_modulus'])
+        self.checksum_minimum = int(merged['checksum_minimum'])
+
+    def check(self, code):
+        """Check one code, returning (is_valid, message)"""
+        if not code:
+            return False, "Item code cannot be empty"
+
+        code = code.upper().strip()
+
+        if len(code) != self.length:
+            return False, f"Item code must be exactly {self.length} characters, got {len(code)}"
+
+        if not self.pattern.match(code):
+            return False, "Item code must start with letter and contain only alphanumeric characters"
+
+        best = None
+        for length, prefixes in self.prefix_table:
+            position = prefixes.get(code[:length])
+            if position is not None and (best is None or position < best):
+                best = position
+        if best is not None:
+            return False, f"Item code cannot start with prohibited prefix: {self.prefixes[best]}"
+
+        for length, suffixes in self.suffix_table:
+            position = suffixes.get(code[-length:])
+            if position is not None and (best is None or position < best):
+                best = position
+        if best is not None:
+            return False, f"Item code cannot end with prohibited suffix: {self.suffixes[best]}"
+
+        reason = self.special_codes.get(code)
+        if reason is not None:
+            return False, f"Item code is reserved: {reason}"
+
+        # "Legacy" checksum validation (simulated); the pattern guarantees ASCII
+        if sum(code.encode()) % self.checksum_modulus < self.checksum_minimum:
+            return False, "Item code failed legacy checksum validation"
+
+        return True, f"Item code {code} validated successfully by 'legacy' system"
+
+    def check_many(self, codes):
+        """Check a list of codes, returning (is_valid, message) tuples in input order"""
+        check = self.check
+        seen = {}
+        results = []
+        for code in codes:
+            # Batches often repeat codes; each distinct code is checked once
+            result = seen.get(code)
+            if result is None:
+                result = seen[code] = check(code)
+            results.append(result)
+        return results
+
+    def describe(self):
+        return {
+            'code_length': self.length,
+            'pattern': self.pattern.pattern,
+            'prohibited_prefixes': self.prefixes,
+            'prohibited_suffixes': self.suffixes,
+            'reserved_codes': sorted(self.special_codes)
+        }
+
+
+class RuleEngine:
+    """Compiled rules, optionally hot-reloaded from a JSON rules file"""
+
+    def __init__(self, rules=None, rules_file=None, reload_interval=2.0):
+        self.rules_file = rules_file
+        self.reload_interval = reload_interval
+        self._compiled = CompiledRules(rules or LEGACY_RULES)
+        self._mtime = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+        if rules_file:
+            self._reload_if_changed(force=True)
+
+    @property
+    def compiled(self):
+        """The current rule set; polls the rules file at most every reload_interval seconds"""
+        if self.rules_file and time.monotonic() >= self._next_check:
+            self._reload_if_changed()
+        return self._compiled
+
+    def _reload_if_changed(self, force=False):
+        with self._lock:
+            if not force and time.monotonic() < self._next_check:
+                return
+            self._next_check = time.monotonic() + self.reload_interval
+            try:
+                mtime = os.stat(self.rules_file).st_mtime
+                if mtime == self._mtime:
+                    return
+                with open(self.rules_file) as f:
+                    compiled = CompiledRules(json.load(f))
+            except (OSError, ValueError, KeyError, TypeError, re.error) as e:
+                logger.error(f"Could not load item rules from {self.rules_file}, keeping current rules: {e}")
+                return
+            self._compiled = compiled
+            self._mtime = mtime
+            self.reloads += 1
+            logger.info(f"Loaded item rules from {self.rules_file}")
+
+    def check(self, code):
+        return self.compiled.check(code)
+
+    def check_many(self, codes):
+        return self.compiled.check_many(codes)
+
+    def describe(self):
+        return self.compiled.describe()
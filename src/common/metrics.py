@@ -0,0 +1,498 @@
+"""
+OpenShift Service Mesh Inventory Demo - Metrics
+Dependency-free Prometheus metrics shared by the backend API and the legacy validator
+
+Metrics live in a per-process Registry and are rendered in the Prometheus
+text exposition format on /metrics. Under gunicorn every worker keeps its
+own registry, and a scrape through the Service reaches one worker at
+random, so each worker also writes a snapshot of its registry to
+METRICS_DIR (every few seconds and when it answers a scrape). /metrics
+merges the snapshots of all workers of the same master: counters and
+histograms are summed, including those of workers that have exited so
+the totals never go backwards, and gauges are reported per live worker
+with a pid label. Set METRICS_DIR to an empty string to serve only the
+answering worker's registry.
+"""
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, g, request
+
+# Latency buckets in seconds, from sub-millisecond cache hits to the legacy timeout
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Return the child metric for one combination of label values"""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._new_child()
+                    self._children[values] = child
+        return child
+
+    def _default(self):
+        return self.labels()
+
+    def collect(self):
+        samples = [(dict(zip(self.labelnames, values)), child.collect()) for values, child in list(self._children.items())]
+        return self.name, self.kind, self.documentation, samples
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def collect(self):
+        return self.value
+
+
+class Counter(_Metric):
+    """Monotonic counter; by convention the name ends in _total"""
+    kind = 'counter'
+    _new_child = _CounterChild
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def collect(self):
+        return self.value
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    _new_child = _GaugeChild
+
+    def set(self, value):
+        self._default().set(value)
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def dec(self, amount=1):
+        self._default().dec(amount)
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def collect(self):
+        """Per-bucket (not cumulative) counts; the last is the +Inf bucket"""
+        with self._lock:
+            return {'buckets': list(self.buckets), 'counts': list(self.counts), 'sum': self.sum}
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+
+class Registry:
+    """Holds the metrics of one process and renders them for scraping"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._add(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._add(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, documentation, labelnames, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def get(self, name):
+        """The metric registered under name, or None"""
+        return next((metric for metric in self._metrics if metric.name == name), None)
+
+    def register_collector(self, collector):
+        """
+        Add a callable evaluated at scrape time. It returns an iterable of
+        (name, kind, documentation, [(labels_dict, value), ...]) tuples and
+        is the way to export values that already live elsewhere (cache
+        counters, pool sizes) without touching them on the request path.
+        """
+        self._collectors.append(collector)
+
+    def collect(self):
+        """Every family as (name, kind, documentation, [(labels_dict, value), ...])"""
+        families = [metric.collect() for metric in self._metrics]
+        for collector in self._collectors:
+            families.extend(collector())
+        return families
+
+    def render(self):
+        return render_families(self.collect())
+
+
+def _histogram_lines(name, labels, value):
+    prefix = labels[:-1] + ',' if labels else '{'
+    lines = []
+    cumulative = 0
+    for bound, count in zip(value['buckets'] + [float('inf')], value['counts']):
+        cumulative += count
+        lines.append(f'{name}_bucket{prefix}le="{_format_value(float(bound))}"}} {cumulative}')
+    lines.append(f'{name}_sum{labels} {_format_value(value["sum"])}')
+    lines.append(f'{name}_count{labels} {cumulative}')
+    return lines
+
+
+def render_families(families):
+    """Prometheus text format for (name, kind, documentation, samples) families"""
+    lines = []
+    for name, kind, documentation, samples in families:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            if value is None:
+                continue
+            names = tuple(labels)
+            formatted = _format_labels(names, [labels[n] for n in names])
+            if kind == 'histogram':
+                lines.extend(_histogram_lines(name, formatted, value))
+            else:
+                lines.append(f'{name}{formatted} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge_families(merged, families, pid, alive):
+    """Add one worker's families to merged: counters and histograms summed, gauges per live pid"""
+    for name, kind, documentation, samples in families:
+        family = merged.setdefault(name, (kind, documentation, {}))
+        values = family[2]
+        for labels, value in samples:
+            if value is None:
+                continue
+            if kind == 'gauge':
+                if not alive:
+                    continue
+                if 'pid' not in labels:
+                    labels = {**labels, 'pid': str(pid)}
+            key = tuple(sorted(labels.items()))
+            previous = values.get(key)
+            if previous is None or kind == 'gauge':
+                values[key] = (labels, value)
+            elif kind == 'histogram':
+                if previous[1]['buckets'] == value['buckets']:
+                    values[key] = (labels, {
+                        'buckets': value['buckets'],
+                        'counts': [a + b for a, b in zip(previous[1]['counts'], value['counts'])],
+                        'sum': previous[1]['sum'] + value['sum']
+                    })
+            else:
+                values[key] = (labels, previous[1] + value)
+
+
+def _merged_families(merged):
+    return [
+        (name, kind, documentation, list(values.values()))
+        for name, (kind, documentation, values) in merged.items()
+    ]
+
+
+class WorkerAggregator:
+    """
+    Shares one process's registry with its sibling workers through snapshot
+    files named <master pid>-<worker pid>.json in directory, and merges the
+    snapshots of every worker of the same master for scrapes.
+
+    Workers recycled by gunicorn (max_requests, timeouts) would leave a
+    snapshot each behind, so the first scrape that finds a dead worker folds
+    its counters and histograms into <master pid>-retired.json and deletes
+    its snapshot. Folding holds an exclusive lock on <master pid>-retired.lock
+    and merging a shared one, so no scrape counts a worker twice or not at all.
+    """
+
+    RETIRED = 'retired'
+
+    def __init__(self, registry, directory, flush_interval=5):
+        self.registry = registry
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _filename(self):
+        return f'{os.getppid()}-{os.getpid()}.json'
+
+    def ensure_flusher(self):
+        """Start this process's snapshot thread (once per process; threads do not survive fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+            except OSError as e:
+                logger.warning("Metrics directory %s unavailable, scrapes report one worker: %s", self.directory, e)
+                return
+            threading.Thread(target=self._flush_loop, name='metrics-flusher', daemon=True).start()
+            # A worker recycled by gunicorn leaves its final counts behind
+            atexit.register(self.write)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.write()
+
+    def write(self):
+        self._write(os.path.join(self.directory, self._filename()), self.registry.collect())
+
+    def _write(self, path, families):
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(families, f)
+            os.replace(path + '.tmp', path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("Could not write metrics snapshot %s: %s", path, e)
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _files(self):
+        """(path, pid or RETIRED, alive) of the snapshots of this master; removes files of dead masters"""
+        master = os.getppid()
+        for filename in os.listdir(self.directory):
+            stem, ext = os.path.splitext(filename)
+            try:
+                ppid, pid = stem.split('-')
+                ppid = int(ppid)
+                pid = pid if pid == self.RETIRED else int(pid)
+            except ValueError:
+                continue
+            path = os.path.join(self.directory, filename)
+            if ppid != master:
+                if not _process_alive(ppid):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                continue
+            if ext != '.json':
+                continue
+            alive = pid != self.RETIRED and (pid == os.getpid() or _process_alive(pid))
+            yield path, pid, alive
+
+    def _retired_path(self, ext):
+        return os.path.join(self.directory, f'{os.getppid()}-{self.RETIRED}{ext}')
+
+    @contextmanager
+    def _locked(self, operation):
+        with open(self._retired_path('.lock'), 'a') as lock:
+            fcntl.flock(lock, operation)
+            yield
+
+    def _retire(self, dead):
+        """Fold the snapshots of dead workers into the retired totals and delete them"""
+        stem = self._retired_path('')
+        with self._locked(fcntl.LOCK_EX):
+            merged = {}
+            _merge_families(merged, self._read(stem + '.json') or [], self.RETIRED, False)
+            folded = []
+            for path in dead:
+                # Another scrape may have folded it while we waited for the lock
+                families = self._read(path)
+                if families is not None:
+                    _merge_families(merged, families, None, False)
+                    folded.append(path)
+            if not folded:
+                return
+            self._write(stem + '.json', _merged_families(merged))
+            for path in folded:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        logger.info("Folded metrics of %d exited workers into the retired totals", len(folded))
+
+    def collect(self):
+        """Families of all workers: counters and histograms summed, gauges per live worker"""
+        self.write()
+        files = list(self._files())
+        dead = [path for path, pid, alive in files if pid != self.RETIRED and not alive]
+        if dead:
+            self._retire(dead)
+        merged = {}
+        with self._locked(fcntl.LOCK_SH):
+            for path, pid, alive in self._files():
+                families = self._read(path)
+                if families is not None:
+                    _merge_families(merged, families, pid, alive)
+        return _merged_families(merged)
+
+    def render(self):
+        try:
+            return render_families(self.collect())
+        except OSError as e:
+            logger.warning("Could not merge worker metrics from %s: %s", self.directory, e)
+            return self.registry.render()
+
+
+def instrument_app(app, registry, prefix):
+    """
+    Record per-route latency and in-flight requests for every request of app,
+    and serve the registry on /metrics, merged with those of the sibling
+    workers through METRICS_DIR (/tmp/<prefix>_metrics by default). Routes
+    are labelled by their URL rule (e.g. /api/inventory/<int:item_id>) to
+    keep label cardinality bounded.
+    """
+    duration = registry.histogram(
+        f'{prefix}_http_request_duration_seconds',
+        'HTTP request latency by route',
+        ('method', 'route', 'status')
+    )
+    in_flight = registry.gauge(
+        f'{prefix}_http_requests_in_flight',
+        'HTTP requests currently being served'
+    )
+    process_info = registry.gauge(
+        f'{prefix}_process_info',
+        'Worker process serving this scrape',
+        ('pid',)
+    )
+    started_at = time.time()
+    directory = os.getenv('METRICS_DIR', os.path.join(tempfile.gettempdir(), f'{prefix}_metrics'))
+    aggregator = WorkerAggregator(
+        registry, directory, flush_interval=float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+    ) if directory else None
+    registry.register_collector(lambda: [(
+        f'{prefix}_process_start_time_seconds', 'gauge',
+        'Start time of the worker process since the epoch', [({}, started_at)]
+    )])
+
+    @app.before_request
+    def _start_timer():
+        if aggregator is not None:
+            aggregator.ensure_flusher()
+        g._metrics_started = time.perf_counter()
+        in_flight.inc()
+
+    @app.after_request
+    def _record_status(response):
+        g._metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def _observe(exception):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return
+        in_flight.dec()
+        status = g.pop('_metrics_status', 500 if exception else 200)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        duration.labels(request.method, route, str(status)).observe(time.perf_counter() - started)
+
+    def metrics():
+        process_info.labels(str(os.getpid())).set(1)
+        body = aggregator.render() if aggregator is not None else registry.render()
+        return Response(body, mimetype=None, content_type=CONTENT_TYPE)
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
+    return registry
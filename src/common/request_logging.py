@@ -0,0 +1,255 @@
+"""
+OpenShift Service Mesh Inventory Demo - Request Logging
+Non-blocking, structured logging shared by the backend API and the legacy validator
+
+Log calls only put the record on a bounded in-memory queue; a background
+QueueListener thread formats it (message arguments are interpolated there,
+not in the request thread) and writes it to stdout and an optional file.
+When the queue is full records are dropped and counted rather than
+blocking requests.
+
+Every record carries the request id of the request that logged it, taken
+from the mesh's x-request-id header (or generated when absent) and echoed
+back as X-Request-ID. Records below WARNING can be sampled per route: the
+decision is taken once per request, so a sampled request keeps all of its
+lines and an unsampled one drops all of them.
+
+Environment:
+    LOG_LEVEL          minimum level (INFO)
+    LOG_OUTPUT         json (default) or text
+    LOG_SAMPLE_RATES   per-route rates, e.g. "/api/inventory=0.1,/validate=0.05"
+    LOG_SAMPLE_RATE    rate for routes not listed (1.0)
+    LOG_QUEUE_SIZE     records buffered before dropping (10000)
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, request
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s'
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_request_id = contextvars.ContextVar('request_id', default=None)
+_sampled = contextvars.ContextVar('log_sampled', default=True)
+
+
+def current_request_id():
+    """The request id of the request being served, or None outside requests"""
+    return _request_id.get()
+
+
+def parse_sample_rates(value):
+    """Parse "route=rate,route=rate" into a dict"""
+    rates = {}
+    for part in (value or '').split(','):
+        route, _, rate = part.strip().rpartition('=')
+        if route:
+            rates[route] = min(1.0, max(0.0, float(rate)))
+    return rates
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamps the request id on records and drops records of unsampled requests"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get() or '-'
+        return record.levelno >= logging.WARNING or _sampled.get()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; extra={...} fields are included as keys"""
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'service': self.service,
+            'logger': record.name,
+            'request_id': getattr(record, 'request_id', '-'),
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread, drops
+    records when the queue is full, and restarts its listener in forked
+    worker processes (threads do not survive fork).
+    """
+
+    def __init__(self, handlers, queue_size=10000):
+        super().__init__(queue.Queue(maxsize=queue_size))
+        self.handlers = handlers
+        self.queue_size = queue_size
+        self.listener = None
+        self.dropped = 0
+        self._pid = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            # Another thread of this process may have started it meanwhile
+            if self._pid == os.getpid():
+                return
+            # New process: the parent's listener thread and queue contents are not ours
+            self.queue = queue.Queue(maxsize=self.queue_size)
+            self.listener = logging.handlers.QueueListener(self.queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        # Keep msg and args for the listener to format; only resolve the
+        # traceback now, while it still describes this thread's exception
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if self._stopped:
+            # Records logged during interpreter shutdown (e.g. by finalizers)
+            # cannot start a new listener thread - write them directly
+            for target in self.handlers:
+                if record.levelno >= target.level:
+                    target.handle(record)
+            return
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        self._stopped = True
+        if self.listener is not None and self._pid == os.getpid():
+            self.listener.stop()
+            self.listener = None
+            self._pid = None
+
+
+_active_handler = None
+
+
+def configure_logging(service, level='INFO', output='json', log_file=None, queue_size=10000,
+                      text_format=TEXT_FORMAT):
+    """
+    Route the root logger through a BackgroundQueueHandler writing to stdout
+    (and log_file when given). Safe to call again; the previous handler is
+    stopped and replaced.
+    """
+    global _active_handler
+
+    formatter = JsonFormatter(service) if output == 'json' else logging.Formatter(text_format)
+    targets = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        try:
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            targets.append(logging.FileHandler(log_file))
+        except OSError as e:
+            print(f"Could not set up file logging at {log_file}: {e}", file=sys.stderr)
+    for target in targets:
+        target.setFormatter(formatter)
+
+    handler = BackgroundQueueHandler(targets, queue_size=queue_size)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    if _active_handler is not None:
+        root.removeHandler(_active_handler)
+        _active_handler.stop()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    _active_handler = handler
+    return handler
+
+
+def bind_request(request_id, route, sample_rates, default_rate=1.0):
+    """
+    Bind a request id (generated when None) and a sampling decision for
+    route to the current context; returns tokens for unbind_request()
+    """
+    rate = sample_rates.get(route, default_rate)
+    return (
+        _request_id.set(request_id or str(uuid.uuid4())),
+        _sampled.set(rate >= 1.0 or random.random() < rate)
+    )
+
+
+def unbind_request(tokens):
+    try:
+        _request_id.reset(tokens[0])
+        _sampled.reset(tokens[1])
+    except ValueError:
+        # Torn down in another context (e.g. a streamed response)
+        _request_id.set(None)
+        _sampled.set(True)
+
+
+def init_request_logging(app, sample_rates=None, default_rate=1.0):
+    """Bind a request id to every request of app and decide its log sampling"""
+    sample_rates = sample_rates or {}
+
+    @app.before_request
+    def _bind_request_id():
+        rule = request.url_rule.rule if request.url_rule is not None else None
+        g._log_context = bind_request(request.headers.get('X-Request-ID'), rule, sample_rates, default_rate)
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = _request_id.get()
+        if request_id and 'X-Request-ID' not in response.headers:
+            response.headers['X-Request-ID'] = request_id
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(exception):
+        tokens = g.pop('_log_context', None)
+        if tokens is not None:
+            unbind_request(tokens)
+
+
+def logging_stats():
+    handler = _active_handler
+    if handler is None:
+        return {'enabled': False}
+    return {
+        'queued': handler.queue.qsize(),
+        'queue_size': handler.queue_size,
+        'dropped': handler.dropped
+    }
+
+
+@atexit.register
+def _flush_on_exit():
+    if _active_handler is not None:
+        _active_handler.stop()
@@ -0,0 +1,120 @@
+"""
+OpenShift Service Mesh Inventory Demo - Serving
+Production launcher shared by the backend API and the legacy validator
+
+Runs a Flask app under gunicorn with settings taken from the environment,
+or under the threaded Flask development server when SERVER=development
+or gunicorn is not installed. Modules in src/common are copied next to
+each service at build time; for local runs add src/common to PYTHONPATH.
+
+Environment:
+    SERVER                     gunicorn (default) or development
+    PORT                       listen port (defaults to the service port)
+    WEB_CONCURRENCY            worker processes
+    GUNICORN_THREADS           threads per worker
+    GUNICORN_WORKER_CLASS      gthread, sync, gevent, ... (default set by the service)
+    GUNICORN_WORKER_CONNECTIONS  concurrent clients per worker (gevent/eventlet only)
+    GUNICORN_KEEPALIVE         seconds to hold idle keep-alive connections
+    GUNICORN_TIMEOUT           seconds before a silent worker is restarted
+    GUNICORN_GRACEFUL_TIMEOUT  seconds to finish in-flight requests on SIGTERM
+    GUNICORN_MAX_REQUESTS      recycle a worker after this many requests (0 = never)
+"""
+
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+
+def server_settings(default_port, default_worker_class='gthread'):
+    """Read serving settings from the environment"""
+    return {
+        'server': os.getenv('SERVER', 'gunicorn').lower(),
+        'bind': f"0.0.0.0:{os.getenv('PORT', str(default_port))}",
+        'workers': int(os.getenv('WEB_CONCURRENCY', '2')),
+        'threads': int(os.getenv('GUNICORN_THREADS', '4')),
+        'worker_class': os.getenv('GUNICORN_WORKER_CLASS', default_worker_class),
+        # Greenlet workers serve long-lived streams without a thread per client
+        'worker_connections': int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000')),
+        # Longer than the default 2s so the sidecar can reuse upstream connections
+        'keepalive': int(os.getenv('GUNICORN_KEEPALIVE', '75')),
+        'timeout': int(os.getenv('GUNICORN_TIMEOUT', '30')),
+        'graceful_timeout': int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '25')),
+        'max_requests': int(os.getenv('GUNICORN_MAX_REQUESTS', '0')),
+        'max_requests_jitter': int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0')),
+    }
+
+
+def gevent_installed():
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def patch_for_greenlets(default_worker_class='gthread'):
+    """
+    Monkey-patch the standard library when gunicorn will run gevent workers.
+    Call it first thing in the launching script: gunicorn only patches in
+    each worker after fork, by when ssl, socket and threading have been
+    imported (and used) by the master. Returns True if it patched.
+    """
+    settings = server_settings(0, default_worker_class)
+    if settings['server'] != 'gunicorn' or settings['worker_class'] != 'gevent' or not gevent_installed():
+        return False
+    from gevent import monkey
+    monkey.patch_all()
+    return True
+
+
+def serve(app, default_port, on_worker_start=None, lazy=False, default_worker_class='gthread'):
+    """
+    Serve app until shutdown.
+    on_worker_start runs once in every worker process before it accepts
+    requests - the place to start per-process background threads.
+    With lazy=True, app is a function returning the app, called in every
+    worker after fork. A gevent worker monkey-patches before that call, so
+    the app's pools, sessions and locks are greenlet-aware instead of native
+    locks inherited from the master (which would freeze the worker).
+    """
+    settings = server_settings(default_port, default_worker_class)
+    server = settings.pop('server')
+
+    if server == 'gunicorn':
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            logger.warning("gunicorn is not installed, falling back to the development server")
+            server = 'development'
+        if settings['worker_class'] == 'gevent' and not gevent_installed():
+            logger.warning("gevent is not installed, falling back to gthread workers")
+            settings['worker_class'] = 'gthread'
+
+    if server != 'gunicorn':
+        host, port = settings['bind'].rsplit(':', 1)
+        logger.info(f"Starting development server on {settings['bind']}")
+        if lazy:
+            app = app()
+        if on_worker_start:
+            on_worker_start()
+        app.run(host=host, port=int(port), threaded=True, debug=app.debug, use_reloader=False)
+        return
+
+    class Launcher(BaseApplication):
+        """Embedded gunicorn application serving a Flask app (built per worker when lazy)"""
+
+        def load_config(self):
+            for key, value in settings.items():
+                self.cfg.set(key, value)
+            if on_worker_start:
+                self.cfg.set('post_worker_init', lambda worker: on_worker_start())
+
+        def load(self):
+            return app() if lazy else app
+
+    logger.info(
+        f"Starting gunicorn on {settings['bind']} with {settings['workers']} workers x "
+        f"{settings['threads']} threads ({settings['worker_class']})"
+    )
+    Launcher().run()
@@ -11,6 +11,12 @@ class InventoryApp {
         this.totalPages = 1;
         this.searchTerm = '';
         this.isLoading = false;
+        // ETag of the last rendered list, sent back on background refreshes
+        this.inventoryEtag = null;
+        // Live updates over Server-Sent Events; polling is the fallback
+        this.eventSource = null;
+        this.streamConnected = false;
+        this.refreshTimer = null;
         
         // Initialize the application
         this.init();
@@ -22,6 +28,7 @@ class InventoryApp {
     init() {
         this.bindEvents();
         this.loadInventory();
+        this.connectEventStream();
         this.updateMeshStatus();
         
         // Set focus on first input
@@ -53,14 +60,59 @@ class InventoryApp {
         // Auto-format item code input
         document.getElementById('item-code').addEventListener('input', this.formatItemCode.bind(this));
         
-        // Auto-refresh every 30 seconds
+        // Auto-refresh every 30 seconds (conditional: unchanged lists cost a 304),
+        // unless the event stream is delivering changes
         setInterval(() => {
-            if (!this.isLoading) {
+            if (!this.isLoading && !this.streamConnected) {
                 this.loadInventory(false); // Silent refresh
             }
         }, 30000);
     }
 
+    /**
+     * Subscribe to inventory changes pushed by the backend
+     */
+    connectEventStream() {
+        if (!('EventSource' in window)) {
+            return; // Polling only
+        }
+
+        this.eventSource = new EventSource(`${this.apiBase}/inventory/stream`);
+
+        // Sent on every (re)connect - catch up on anything missed while away
+        this.eventSource.addEventListener('ready', () => {
+            this.streamConnected = true;
+            this.scheduleRefresh();
+        });
+
+        ['created', 'updated', 'adjusted', 'deleted', 'bulk_imported'].forEach(type => {
+            this.eventSource.addEventListener(type, () => this.scheduleRefresh());
+        });
+
+        // The server dropped us for falling behind; reconnect and reload
+        this.eventSource.addEventListener('resync', () => this.scheduleRefresh());
+
+        // EventSource reconnects by itself; poll until it does
+        this.eventSource.onerror = () => {
+            this.streamConnected = false;
+        };
+    }
+
+    /**
+     * Coalesce bursts of change events into one refresh
+     */
+    scheduleRefresh() {
+        if (this.refreshTimer) return;
+        this.refreshTimer = setTimeout(() => {
+            this.refreshTimer = null;
+            if (this.isLoading) {
+                this.scheduleRefresh();
+            } else {
+                this.loadInventory(false);
+            }
+        }, 500);
+    }
+
     /**
      * Format item code input (uppercase, max length)
      */
@@ -113,7 +165,9 @@ class InventoryApp {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                    'X-Service-Mesh': 'true' // Custom header for service mesh observability
+                    'X-Service-Mesh': 'true', // Custom header for service mesh observability
+                    // Mesh retries of this request replay the first response instead of re-running it
+                    'Idempotency-Key': this.newIdempotencyKey()
                 },
                 body: JSON.stringify(item)
             });
@@ -234,18 +288,31 @@ class InventoryApp {
                 params.append('search', this.searchTerm);
             }
 
+            const headers = {
+                'X-Service-Mesh': 'true' // Custom header for service mesh observability
+            };
+            
+            // Background refreshes revalidate the current page instead of re-downloading it
+            if (!showLoading && this.inventoryEtag) {
+                headers['If-None-Match'] = this.inventoryEtag;
+            }
+
             // Fetch data from the API endpoint (Nginx will proxy /api to backend-service)
             const response = await fetch(`${this.apiBase}/inventory?${params}`, {
-                headers: {
-                    'X-Service-Mesh': 'true' // Custom header for service mesh observability
-                }
+                headers,
+                cache: 'no-store' // Handle 304 here rather than in the browser cache
             });
 
+            if (response.status === 304) {
+                return; // Nothing changed since the last render
+            }
+
             if (!response.ok) {
                 throw new Error(`HTTP ${response.status}: ${response.statusText}`);
             }
 
             const data = await response.json();
+            this.inventoryEtag = response.headers.get('ETag');
             this.renderInventory(data);
             
             if (showLoading) {
@@ -473,6 +540,16 @@ class InventoryApp {
         }
     }
 
+    /**
+     * Utility: Unique key for one logical write
+     */
+    newIdempotencyKey() {
+        if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+            return window.crypto.randomUUID();
+        }
+        return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    }
+
     /**
      * Utility: Escape HTML to prevent XSS
      */
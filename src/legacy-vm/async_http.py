@@ -0,0 +1,230 @@
+"""
+OpenShift Service Mesh Inventory Demo - Asyncio HTTP Server
+Minimal HTTP/1.1 server on asyncio streams, used by the legacy validator when SERVER=asyncio
+
+Standard library only, like the rest of the VM. It speaks what the
+validator's clients need: GET and POST with Content-Length bodies, JSON
+responses and keep-alive connections. Handlers are coroutines, so a request
+waiting on the simulated legacy lookup holds no thread and a single process
+keeps thousands of validations in flight. On SIGTERM the listener closes,
+idle connections are dropped and in-flight requests get graceful_timeout
+seconds to finish.
+"""
+
+import asyncio
+import json
+import logging
+import signal
+import time
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from request_logging import bind_request, current_request_id, unbind_request
+
+logger = logging.getLogger(__name__)
+
+# Request line plus headers; larger heads are rejected with 431
+MAX_HEAD_SIZE = 64 * 1024
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """One parsed HTTP request"""
+
+    def __init__(self, method, target, version, headers, body):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = parts.path
+        self.args = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+    def get_json(self):
+        """The body parsed as JSON, or None when it is missing or malformed"""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.0':
+            return connection == 'keep-alive'
+        return connection != 'close'
+
+
+def encode_response(status, body, content_type=None, keep_alive=True, headers=None):
+    """Serialize a response; dict/list bodies are sent as JSON"""
+    if isinstance(body, (dict, list)):
+        payload = (json.dumps(body, sort_keys=True, separators=(',', ':'), default=str) + '\n').encode()
+        content_type = content_type or 'application/json'
+    elif isinstance(body, str):
+        payload = body.encode()
+        content_type = content_type or 'text/plain; charset=utf-8'
+    else:
+        payload = body or b''
+        content_type = content_type or 'application/octet-stream'
+
+    lines = [
+        f'HTTP/1.1 {status} {HTTPStatus(status).phrase}',
+        f'Content-Type: {content_type}',
+        f'Content-Length: {len(payload)}',
+        f"Connection: {'keep-alive' if keep_alive else 'close'}",
+    ]
+    for name, value in (headers or {}).items():
+        lines.append(f'{name}: {value}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+
+class AsyncHTTPServer:
+    """
+    Routes (method, path) to coroutine handlers taking a Request and
+    returning body, (body, status) or (body, status, content_type).
+    """
+
+    def __init__(self, routes, observe=None, in_flight=None, sample_rates=None, default_sample_rate=1.0,
+                 keepalive_timeout=75, max_body_size=16 * 1024 * 1024, graceful_timeout=25):
+        self.routes = routes
+        self.paths = {path for _, path in routes}
+        # Optional callback(method, route, status, seconds) for metrics
+        self.observe = observe
+        # Optional gauge with inc()/dec()
+        self.in_flight = in_flight
+        self.sample_rates = sample_rates or {}
+        self.default_sample_rate = default_sample_rate
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body_size = max_body_size
+        self.graceful_timeout = graceful_timeout
+        self._idle = set()
+        self._busy = 0
+        self._closing = False
+
+    async def _read_request(self, reader):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keepalive_timeout)
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431, 'Request header too large')
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise HTTPError(400, 'Malformed request line')
+
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise HTTPError(411, 'Chunked request bodies are not supported, send Content-Length')
+        try:
+            length = int(headers.get('content-length', '0'))
+        except ValueError:
+            raise HTTPError(400, 'Invalid Content-Length')
+        if length > self.max_body_size:
+            raise HTTPError(413, 'Request body too large')
+        body = await reader.readexactly(length) if length else b''
+        return Request(method.upper(), target, version, headers, body)
+
+    async def _dispatch(self, request):
+        handler = self.routes.get((request.method, request.path))
+        if handler is None:
+            if request.path in self.paths:
+                return {'error': 'Method not allowed'}, 405, None
+            return {'error': 'Not found'}, 404, None
+        result = await handler(request)
+        if not isinstance(result, tuple):
+            return result, 200, None
+        body, status, *rest = result
+        return body, status, rest[0] if rest else None
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while not self._closing:
+                self._idle.add(writer)
+                try:
+                    request = await self._read_request(reader)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except HTTPError as e:
+                    writer.write(encode_response(e.status, {'error': e.message}, keep_alive=False))
+                    await writer.drain()
+                    return
+                finally:
+                    self._idle.discard(writer)
+
+                keep_alive = await self._respond(request, writer)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request, writer):
+        self._busy += 1
+        if self.in_flight is not None:
+            self.in_flight.inc()
+        started = time.perf_counter()
+        route = request.path if request.path in self.paths else 'unmatched'
+        tokens = bind_request(request.headers.get('x-request-id'), route, self.sample_rates, self.default_sample_rate)
+        status = 500
+        try:
+            try:
+                body, status, content_type = await self._dispatch(request)
+            except Exception as e:
+                logger.exception(f"Unhandled error serving {request.method} {request.path}: {e}")
+                body, status, content_type = {'error': 'Internal server error'}, 500, None
+
+            keep_alive = request.keep_alive and not self._closing
+            writer.write(encode_response(
+                status, body, content_type, keep_alive=keep_alive,
+                headers={'X-Request-ID': current_request_id()}
+            ))
+            await writer.drain()
+            return keep_alive
+        finally:
+            unbind_request(tokens)
+            self._busy -= 1
+            if self.in_flight is not None:
+                self.in_flight.dec()
+            if self.observe is not None:
+                self.observe(request.method, route, status, time.perf_counter() - started)
+
+    async def serve(self, host, port, backlog=2048):
+        server = await asyncio.start_server(
+            self.handle_connection, host, port, backlog=backlog, limit=MAX_HEAD_SIZE, reuse_address=True
+        )
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(signum, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        logger.info(f"Serving on {host}:{port} (asyncio)")
+        async with server:
+            await stop.wait()
+            logger.info("Shutting down: closing listener and idle connections")
+            self._closing = True
+            server.close()
+            for writer in list(self._idle):
+                writer.close()
+            deadline = time.monotonic() + self.graceful_timeout
+            while self._busy and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            if self._busy:
+                logger.warning(f"{self._busy} requests still running at shutdown")
+
+    def run(self, host='0.0.0.0', port=8080):
+        asyncio.run(self.serve(host, port))
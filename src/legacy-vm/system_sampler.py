@@ -0,0 +1,164 @@
+"""
+OpenShift Service Mesh Inventory Demo - System Sampler
+Background sampling of VM load, memory, disk and uptime for /system and /metrics
+
+A daemon thread reads /proc, the load average and disk usage every
+interval seconds and keeps the latest snapshot plus a ring buffer of
+recent load and memory points. /system and /metrics only read what was
+last sampled, so polling them costs no syscalls however often status
+scripts and dashboards ask. Threads do not survive fork, so every worker
+process starts its own sampler.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+GB = 1024 ** 3
+
+# /proc/meminfo fields we need, in kB
+MEMINFO_FIELDS = ('MemTotal', 'MemAvailable', 'MemFree')
+
+
+def read_meminfo(path='/proc/meminfo'):
+    """MEMINFO_FIELDS from /proc/meminfo in bytes"""
+    values = {}
+    with open(path) as f:
+        for line in f:
+            name, _, rest = line.partition(':')
+            if name in MEMINFO_FIELDS:
+                values[name] = int(rest.split()[0]) * 1024
+                if len(values) == len(MEMINFO_FIELDS):
+                    break
+    return values
+
+
+def read_uptime(path='/proc/uptime'):
+    with open(path) as f:
+        return float(f.read().split()[0])
+
+
+class SystemSampler:
+    """Samples system stats every interval seconds, keeping history_size recent points"""
+
+    def __init__(self, interval=15, history_size=240, disk_path='/'):
+        self.interval = interval
+        self.disk_path = disk_path
+        self.hostname = os.uname()[1]
+        self._history = deque(maxlen=history_size)
+        self._latest = None
+        self._sampled_at = None
+        self.samples = 0
+        self.errors = 0
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pid = None
+
+    def start(self):
+        """Take a first sample and start the sampling thread of this process (idempotent)"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stop.clear()
+        self.sample()
+        threading.Thread(target=self._run, name='system-sampler', daemon=True).start()
+        logger.info("System sampler started (every %ss, %s points of history)", self.interval, self._history.maxlen)
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        try:
+            disk = shutil.disk_usage(self.disk_path)
+            memory = read_meminfo()
+            uptime = read_uptime()
+            load = os.getloadavg()
+        except (OSError, ValueError, IndexError) as e:
+            self.errors += 1
+            self.last_error = str(e)
+            logger.warning("System sample failed: %s", e)
+            return
+
+        mem_total = memory['MemTotal']
+        mem_available = memory.get('MemAvailable', memory.get('MemFree', 0))
+        now = datetime.now(timezone.utc)
+        snapshot = {
+            'hostname': self.hostname,
+            'uptime_seconds': uptime,
+            'disk': {'total_bytes': disk.total, 'free_bytes': disk.free, 'used_bytes': disk.used},
+            'memory': {'total_bytes': mem_total, 'available_bytes': mem_available},
+            'load_average': load,
+            'timestamp': now.replace(tzinfo=None).isoformat(),
+        }
+        point = {
+            'timestamp': snapshot['timestamp'],
+            'load_1min': load[0],
+            'memory_used_percent': round((1 - mem_available / mem_total) * 100, 1),
+        }
+        # Replace references rather than mutating, so readers never see a half-built sample
+        self._latest = snapshot
+        self._sampled_at = time.monotonic()
+        self._history.append(point)
+        self.samples += 1
+
+    def latest(self):
+        """The last snapshot, or None if nothing has been sampled yet"""
+        if self._pid != os.getpid():
+            self.start()
+        return self._latest
+
+    def age(self):
+        """Seconds since the last successful sample"""
+        sampled_at = self._sampled_at
+        return None if sampled_at is None else time.monotonic() - sampled_at
+
+    def history(self, minutes):
+        """Load and memory points of the last minutes, oldest first"""
+        count = min(len(self._history), int(minutes * 60 / self.interval))
+        points = list(self._history)
+        return points[len(points) - count:] if count > 0 else []
+
+    def stats(self):
+        return {
+            'interval_seconds': self.interval,
+            'history_points': len(self._history),
+            'samples': self.samples,
+            'errors': self.errors,
+            'last_error': self.last_error
+        }
+
+    def collect(self, prefix):
+        """Registry collector exporting the last snapshot as gauges"""
+        snapshot = self._latest
+        if snapshot is None:
+            return []
+        load = snapshot['load_average']
+        return [
+            (f'{prefix}_system_load_average', 'gauge', 'System load average',
+             [({'window': '1m'}, load[0]), ({'window': '5m'}, load[1]), ({'window': '15m'}, load[2])]),
+            (f'{prefix}_system_memory_bytes', 'gauge', 'System memory by state',
+             [({'state': 'total'}, snapshot['memory']['total_bytes']),
+              ({'state': 'available'}, snapshot['memory']['available_bytes'])]),
+            (f'{prefix}_system_disk_bytes', 'gauge', 'Root filesystem space by state',
+             [({'state': 'total'}, snapshot['disk']['total_bytes']),
+              ({'state': 'free'}, snapshot['disk']['free_bytes']),
+              ({'state': 'used'}, snapshot['disk']['used_bytes'])]),
+            (f'{prefix}_system_uptime_seconds', 'gauge', 'System uptime at the last sample',
+             [({}, snapshot['uptime_seconds'])]),
+            (f'{prefix}_system_sample_age_seconds', 'gauge', 'Seconds since the last system sample',
+             [({}, self.age())]),
+            (f'{prefix}_system_sample_errors_total', 'counter', 'Failed system samples',
+             [({}, self.errors)]),
+        ]
@@ -5,221 +5,380 @@ Simulates legacy business logic for item validation
 Modern Python 3 on RHEL 8 (because life's too short for Python 2.7 dependency hell)
 """
 
+import asyncio
 import json
-import re
-import shutil
 import os
 from flask import Flask, request, jsonify
+from serving import serve
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Registry, instrument_app
+from async_http import AsyncHTTPServer
+from system_sampler import GB, SystemSampler
+from item_rules import RuleEngine
+from request_logging import configure_logging, init_request_logging, logging_stats, parse_sample_rates
 from datetime import datetime
 import logging
 import time
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Configure logging: written to stdout and the log file by a background thread
+configure_logging(
+    'legacy-validator',
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+    output=os.getenv('LOG_OUTPUT', 'json').lower(),
+    log_file=os.getenv('VALIDATOR_LOG_FILE', '/opt/validator/logs/validator.log'),
+    queue_size=int(os.getenv('LOG_QUEUE_SIZE', '10000'))
 )
 logger = logging.getLogger('legacy-validator')
 
-# Add file handler
-try:
-    os.makedirs('/opt/validator/logs', exist_ok=True)
-    file_handler = logging.FileHandler('/opt/validator/logs/validator.log')
-    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-    logger.addHandler(file_handler)
-except Exception as e:
-    logger.warning(f"Could not set up file logging: {e}")
-
 app = Flask(__name__)
 
-# "Legacy" business rules database (simulated)
-LEGACY_RULES = {
-    'prohibited_prefixes': ['XX', 'ZZ', 'TEST', 'TEMP', 'DEMO', 'SYS'],
-    'prohibited_suffixes': ['000', '999', 'DEL', 'BAD'],
-    'required_pattern': r'^[A-Z][A-Z0-9]{5}$',
-    'special_codes': {
-        'LEGACY': 'Reserved for legacy system migration',
-        'SYSTEM': 'Reserved for system use',
-        'ADMINS': 'Reserved for administrative functions'
-    }
-}
+# Request ids from the mesh's x-request-id on every log line, per-route sampling
+init_request_logging(
+    app,
+    sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', '')),
+    default_rate=float(os.getenv('LOG_SAMPLE_RATE', '1.0'))
+)
 
-def validate_item_code(code):
+# Prometheus metrics served on /metrics
+metrics = Registry()
+instrument_app(app, metrics, 'legacy_validator')
+validation_results = metrics.counter(
+    'legacy_validator_validations_total',
+    'Item codes validated, by endpoint and result',
+    ('endpoint', 'result')
+)
+batch_sizes = metrics.histogram(
+    'legacy_validator_batch_size',
+    'Item codes per /validate/batch request',
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000)
+)
+
+# Upper bound on codes accepted by a single /validate/batch request
+MAX_BATCH_SIZE = int(os.getenv('VALIDATOR_MAX_BATCH_SIZE', '10000'))
+
+# Simulated "legacy" database lookup latency in seconds
+LOOKUP_DELAY = 0.1
+
+# gunicorn (default) or development run the Flask app; asyncio runs the
+# same endpoints on one event loop, so waiting lookups hold no thread
+SERVER_MODE = os.getenv('SERVER', 'gunicorn').lower()
+
+# System stats for /system and /metrics, sampled in the background so
+# polling them costs nothing; history covers SYSTEM_HISTORY_MINUTES
+SYSTEM_SAMPLE_INTERVAL = float(os.getenv('SYSTEM_SAMPLE_INTERVAL', '15'))
+SYSTEM_HISTORY_MINUTES = float(os.getenv('SYSTEM_HISTORY_MINUTES', '60'))
+system_sampler = SystemSampler(
+    interval=SYSTEM_SAMPLE_INTERVAL,
+    history_size=max(1, int(SYSTEM_HISTORY_MINUTES * 60 / SYSTEM_SAMPLE_INTERVAL))
+)
+metrics.register_collector(lambda: system_sampler.collect('legacy_validator'))
+
+# "Legacy" business rules, compiled once; LEGACY_RULES_FILE (JSON) overrides
+# them and is reloaded when it changes
+rules = RuleEngine(rules_file=os.getenv('LEGACY_RULES_FILE'))
+
+def check_item_code(code):
     """
     "Legacy" validation logic with complex business rules
     (Actually modern Python 3 but pretending to be legacy!)
+    Rule checks only - the simulated lookup is paid by the callers.
     """
-    if not code:
-        return False, "Item code cannot be empty"
-    
-    # Convert to uppercase for validation
-    code = code.upper().strip()
-    
-    # Length check
-    if len(code) != 6:
-        return False, f"Item code must be exactly 6 characters, got {len(code)}"
-    
-    # Pattern check
-    if not re.match(LEGACY_RULES['required_pattern'], code):
-        return False, "Item code must start with letter and contain only alphanumeric characters"
-    
-    # Check prohibited prefixes
-    for prefix in LEGACY_RULES['prohibited_prefixes']:
-        if code.startswith(prefix):
-            return False, f"Item code cannot start with prohibited prefix: {prefix}"
+    return rules.check(code)
+
+def validate_item_code(code):
+    """Validate a single code, paying the simulated lookup for valid codes"""
+    is_valid, message = check_item_code(code)
+    if is_valid:
+        # Simulate "legacy" database lookup delay
+        time.sleep(LOOKUP_DELAY)
+    return is_valid, message
+
+def validate_item_codes(codes):
+    """
+    Validate many codes at once. The rule checks run per code, but the
+    simulated lookup is a single round trip for the whole batch.
+    """
+    results = rules.check_many(codes)
+    if any(is_valid for is_valid, _ in results):
+        time.sleep(LOOKUP_DELAY)
+    return results
+
+async def validate_item_code_async(code):
+    """validate_item_code() with an awaitable lookup, for the asyncio server"""
+    is_valid, message = check_item_code(code)
+    if is_valid:
+        await asyncio.sleep(LOOKUP_DELAY)
+    return is_valid, message
+
+async def validate_item_codes_async(codes):
+    """validate_item_codes() with an awaitable lookup, for the asyncio server"""
+    results = rules.check_many(codes)
+    if any(is_valid for is_valid, _ in results):
+        await asyncio.sleep(LOOKUP_DELAY)
+    return results
+
+# Response bodies, shared by the Flask routes and the asyncio handlers
+
+def health_status():
+    return {
+        'status': 'healthy',
+        'service': 'legacy-validator',
+        'timestamp': datetime.utcnow().isoformat(),
+        'version': '1.0.0',
+        'python_version': '3.8+ (Modern but pretending to be legacy!)',
+        'os': 'RHEL 8',
+        'note': 'This is a modern service simulating legacy behavior'
+    }
+
+def validation_failure(message, status):
+    return {
+        'valid': False,
+        'message': message,
+        'timestamp': datetime.utcnow().isoformat()
+    }, status
+
+def parse_validate_request(data):
+    """Return (code, None), or (None, (body, status)) for a bad request"""
+    if not data or 'code' not in data:
+        return None, validation_failure('Missing item code in request', 400)
+    return data['code'], None
+
+def validation_response(code, is_valid, message):
+    validation_results.labels('validate', 'valid' if is_valid else 'invalid').inc()
+    logger.info("Validation result for %s: %s - %s", code, is_valid, message)
+    return {
+        'valid': is_valid,
+        'message': message,
+        'code': code.upper() if code else '',
+        'timestamp': datetime.utcnow().isoformat(),
+        'validator': 'modern-legacy-simulator-rhel8-python3'
+    }
+
+def parse_batch_request(data):
+    """Return (codes, None), or (None, (body, status)) for a bad request"""
+    codes = data.get('codes') if isinstance(data, dict) else None
     
-    # Check prohibited suffixes
-    for suffix in LEGACY_RULES['prohibited_suffixes']:
-        if code.endswith(suffix):
-            return False, f"Item code cannot end with prohibited suffix: {suffix}"
+    if not isinstance(codes, list):
+        return None, validation_failure('Missing list of item codes in request', 400)
     
-    # Check special reserved codes
-    if code in LEGACY_RULES['special_codes']:
-        return False, f"Item code is reserved: {LEGACY_RULES['special_codes'][code]}"
+    if len(codes) > MAX_BATCH_SIZE:
+        return None, validation_failure(f'Batch too large: {len(codes)} codes (maximum {MAX_BATCH_SIZE})', 413)
     
-    # "Legacy" checksum validation (simulated)
-    checksum = sum(ord(c) for c in code) % 97
-    if checksum < 10:
-        return False, "Item code failed legacy checksum validation"
+    # Non-string entries are rejected individually instead of failing the batch
+    return [code if isinstance(code, str) else '' for code in codes], None
+
+def batch_response(codes, results):
+    valid_count = sum(1 for is_valid, _ in results if is_valid)
+    batch_sizes.observe(len(codes))
+    validation_results.labels('batch', 'valid').inc(valid_count)
+    validation_results.labels('batch', 'invalid').inc(len(codes) - valid_count)
+    logger.info("Validated batch of %d codes: %d valid", len(codes), valid_count)
     
-    # Simulate "legacy" database lookup delay
-    time.sleep(0.1)
+    return {
+        'results': [
+            {
+                'valid': is_valid,
+                'message': message,
+                'code': code.upper()
+            }
+            for code, (is_valid, message) in zip(codes, results)
+        ],
+        'count': len(results),
+        'valid_count': valid_count,
+        'timestamp': datetime.utcnow().isoformat(),
+        'validator': 'modern-legacy-simulator-rhel8-python3'
+    }
+
+def system_status(minutes=0):
+    """Latest sampled system information (plus minutes of history), as (body, status)"""
+    snapshot = system_sampler.latest()
+    if snapshot is None:
+        return {
+            'error': f'Failed to get system info: {system_sampler.last_error or "no sample yet"}',
+            'timestamp': datetime.utcnow().isoformat()
+        }, 500
     
-    return True, f"Item code {code} validated successfully by 'legacy' system"
+    disk, memory, load_avg = snapshot['disk'], snapshot['memory'], snapshot['load_average']
+    body = {
+        'hostname': snapshot['hostname'],
+        'uptime_hours': round(snapshot['uptime_seconds'] / 3600, 2),
+        'disk': {
+            'free_gb': round(disk['free_bytes'] / GB, 2),
+            'total_gb': round(disk['total_bytes'] / GB, 2),
+            'used_percent': round((disk['used_bytes'] / disk['total_bytes']) * 100, 1)
+        },
+        'memory': {
+            'total_gb': round(memory['total_bytes'] / GB, 2),
+            'available_gb': round(memory['available_bytes'] / GB, 2),
+            'used_percent': round((1 - memory['available_bytes'] / memory['total_bytes']) * 100, 1)
+        },
+        'load_average': {
+            '1min': load_avg[0],
+            '5min': load_avg[1],
+            '15min': load_avg[2]
+        },
+        'system_info': {
+            'python_version': '3.8+',
+            'os': 'RHEL 8',
+            'message': 'Modern system simulating legacy behavior - much easier!'
+        },
+        'timestamp': snapshot['timestamp'],
+        'sample_age_seconds': round(system_sampler.age(), 1),
+        'sample_interval_seconds': system_sampler.interval
+    }
+    if minutes > 0:
+        body['history'] = system_sampler.history(minutes)
+    return body, 200
+
+def parse_history_minutes(value):
+    """?minutes= of /system, clamped to the history kept; invalid values mean none"""
+    try:
+        return min(max(float(value or 0), 0), SYSTEM_HISTORY_MINUTES)
+    except ValueError:
+        return 0
+
+def service_info():
+    return {
+        'service': 'legacy-validator',
+        'version': '1.0.0',
+        'description': 'Modern service simulating legacy item validation (RHEL 8 + Python 3)',
+        'stack': {
+            'python': '3.8+',
+            'os': 'RHEL 8',
+            'flask': 'Modern version',
+            'modernization_status': 'Actually modern, just simulating legacy behavior!'
+        },
+        'serving': SERVER_MODE,
+        'rules': {
+            **rules.describe(),
+            'rules_file': rules.rules_file,
+            'reloads': rules.reloads
+        },
+        'logging': logging_stats(),
+        'system_sampling': system_sampler.stats(),
+        'endpoints': {
+            '/health': 'Health check',
+            '/validate': 'POST - Validate item code',
+            '/validate/batch': 'POST - Validate a list of item codes',
+            '/system': 'System monitoring info (sampled; ?minutes=N adds load/memory history)',
+            '/metrics': 'Prometheus metrics',
+            '/info': 'Service information'
+        }
+    }
+
+# Flask routes (gunicorn or the development server)
 
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({
-        'status': 'healthy',
-        'service': 'legacy-validator',
-        'timestamp': datetime.utcnow().isoformat(),
-        'version': '1.0.0',
-        'python_version': '3.8+ (Modern but pretending to be legacy!)',
-        'os': 'RHEL 8',
-        'note': 'This is a modern service simulating legacy behavior'
-    })
+    return jsonify(health_status())
 
 @app.route('/validate', methods=['POST'])
 def validate():
     """Main validation endpoint"""
     try:
-        data = request.get_json()
-        
-        if not data or 'code' not in data:
-            return jsonify({
-                'valid': False,
-                'message': 'Missing item code in request',
-                'timestamp': datetime.utcnow().isoformat()
-            }), 400
-        
-        code = data['code']
-        logger.info(f"Validating item code: {code}")
+        code, error = parse_validate_request(request.get_json())
+        if error:
+            return jsonify(error[0]), error[1]
         
         is_valid, message = validate_item_code(code)
+        return jsonify(validation_response(code, is_valid, message))
         
-        response = {
-            'valid': is_valid,
-            'message': message,
-            'code': code.upper() if code else '',
-            'timestamp': datetime.utcnow().isoformat(),
-            'validator': 'modern-legacy-simulator-rhel8-python3'
-        }
+    except Exception as e:
+        logger.error(f"Validation error: {e}")
+        return jsonify(validation_failure(f'Legacy validation service error: {str(e)}', 500)[0]), 500
+
+@app.route('/validate/batch', methods=['POST'])
+def validate_batch():
+    """Batch validation endpoint - results are returned in input order"""
+    try:
+        codes, error = parse_batch_request(request.get_json(silent=True))
+        if error:
+            return jsonify(error[0]), error[1]
         
-        logger.info(f"Validation result for {code}: {is_valid} - {message}")
-        return jsonify(response)
+        return jsonify(batch_response(codes, validate_item_codes(codes)))
         
     except Exception as e:
-        logger.error(f"Validation error: {e}")
-        return jsonify({
-            'valid': False,
-            'message': f'Legacy validation service error: {str(e)}',
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+        logger.error(f"Batch validation error: {e}")
+        return jsonify(validation_failure(f'Legacy validation service error: {str(e)}', 500)[0]), 500
 
 @app.route('/system', methods=['GET'])
 def system_info():
     """System information endpoint for demo monitoring"""
+    body, status = system_status(parse_history_minutes(request.args.get('minutes')))
+    return jsonify(body), status
+
+@app.route('/info', methods=['GET'])
+def info():
+    """Service information"""
+    return jsonify(service_info())
+
+# asyncio handlers (SERVER=asyncio): the same endpoints, with an awaitable lookup
+
+async def health_async(request):
+    return health_status()
+
+async def validate_async(request):
     try:
-        # Disk usage
-        disk_usage = shutil.disk_usage('/')
+        code, error = parse_validate_request(request.get_json())
+        if error:
+            return error
         
-        # Memory info
-        with open('/proc/meminfo', 'r') as f:
-            meminfo = f.read()
+        is_valid, message = await validate_item_code_async(code)
+        return validation_response(code, is_valid, message)
         
-        mem_lines = meminfo.split('\n')
-        mem_total = int([line for line in mem_lines if 'MemTotal' in line][0].split()[1]) * 1024
-        mem_available_lines = [line for line in mem_lines if 'MemAvailable' in line]
-        if mem_available_lines:
-            mem_available = int(mem_available_lines[0].split()[1]) * 1024
-        else:
-            mem_free = int([line for line in mem_lines if 'MemFree' in line][0].split()[1]) * 1024
-            mem_available = mem_free
+    except Exception as e:
+        logger.error(f"Validation error: {e}")
+        return validation_failure(f'Legacy validation service error: {str(e)}', 500)
+
+async def validate_batch_async(request):
+    try:
+        codes, error = parse_batch_request(request.get_json())
+        if error:
+            return error
         
-        # Load average
-        load_avg = os.getloadavg()
+        return batch_response(codes, await validate_item_codes_async(codes))
         
-        return jsonify({
-            'hostname': os.uname()[1],
-            'uptime_hours': round(float(open('/proc/uptime').read().split()[0]) / 3600, 2),
-            'disk': {
-                'free_gb': round(disk_usage.free / (1024**3), 2),
-                'total_gb': round(disk_usage.total / (1024**3), 2),
-                'used_percent': round((disk_usage.used / disk_usage.total) * 100, 1)
-            },
-            'memory': {
-                'total_gb': round(mem_total / (1024**3), 2),
-                'available_gb': round(mem_available / (1024**3), 2),
-                'used_percent': round((1 - mem_available / mem_total) * 100, 1)
-            },
-            'load_average': {
-                '1min': load_avg[0],
-                '5min': load_avg[1],
-                '15min': load_avg[2]
-            },
-            'system_info': {
-                'python_version': '3.8+',
-                'os': 'RHEL 8',
-                'message': 'Modern system simulating legacy behavior - much easier!'
-            },
-            'timestamp': datetime.utcnow().isoformat()
-        })
     except Exception as e:
-        return jsonify({
-            'error': f'Failed to get system info: {str(e)}',
-            'timestamp': datetime.utcnow().isoformat()
-        }), 500
+        logger.error(f"Batch validation error: {e}")
+        return validation_failure(f'Legacy validation service error: {str(e)}', 500)
 
-@app.route('/info', methods=['GET'])
-def info():
-    """Service information"""
-    return jsonify({
-        'service': 'legacy-validator',
-        'version': '1.0.0',
-        'description': 'Modern service simulating legacy item validation (RHEL 8 + Python 3)',
-        'stack': {
-            'python': '3.8+',
-            'os': 'RHEL 8',
-            'flask': 'Modern version',
-            'modernization_status': 'Actually modern, just simulating legacy behavior!'
-        },
-        'rules': {
-            'code_length': 6,
-            'pattern': 'Letter followed by 5 alphanumeric characters',
-            'prohibited_prefixes': LEGACY_RULES['prohibited_prefixes'],
-            'prohibited_suffixes': LEGACY_RULES['prohibited_suffixes']
+async def system_info_async(request):
+    return system_status(parse_history_minutes(request.args.get('minutes')))
+
+async def info_async(request):
+    return service_info()
+
+async def metrics_async(request):
+    metrics.get('legacy_validator_process_info').labels(str(os.getpid())).set(1)
+    return metrics.render(), 200, METRICS_CONTENT_TYPE
+
+def run_asyncio_server():
+    """Serve every endpoint from one asyncio event loop"""
+    duration = metrics.get('legacy_validator_http_request_duration_seconds')
+    server = AsyncHTTPServer(
+        {
+            ('GET', '/health'): health_async,
+            ('POST', '/validate'): validate_async,
+            ('POST', '/validate/batch'): validate_batch_async,
+            ('GET', '/system'): system_info_async,
+            ('GET', '/info'): info_async,
+            ('GET', '/metrics'): metrics_async,
         },
-        'endpoints': {
-            '/health': 'Health check',
-            '/validate': 'POST - Validate item code',
-            '/system': 'System monitoring info',
-            '/info': 'Service information'
-        }
-    })
+        observe=lambda method, route, status, seconds: duration.labels(method, route, str(status)).observe(seconds),
+        in_flight=metrics.get('legacy_validator_http_requests_in_flight'),
+        sample_rates=parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', '')),
+        default_sample_rate=float(os.getenv('LOG_SAMPLE_RATE', '1.0')),
+        keepalive_timeout=int(os.getenv('GUNICORN_KEEPALIVE', '75')),
+        graceful_timeout=int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '25'))
+    )
+    system_sampler.start()
+    server.run(port=int(os.getenv('PORT', '8080')))
 
 if __name__ == '__main__':
     logger.info("Starting 'Legacy' Item Validation Service")
     logger.info("RHEL 8 + Python 3 - Modern but simulating legacy behavior!")
     logger.info("Service will be available at http://0.0.0.0:8080")
-    app.run(host='0.0.0.0', port=8080, debug=False)
\ No newline at end of file
+    if SERVER_MODE == 'asyncio':
+        run_asyncio_server()
+    else:
+        serve(app, default_port=8080, on_worker_start=system_sampler.start)
\ No newline at end of file